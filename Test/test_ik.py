@@ -17,8 +17,7 @@ for id in ids:
         relative=True
         )
     env._step()
-    while not env.instance_channel.data[id]['move_done']:
-        env._step()
+    env.wait_until(lambda: env.instance_channel.data[id]['move_done'])
     env.instance_channel.set_action(
         'IKTargetDoMove',
         id=id,
@@ -27,10 +26,7 @@ for id in ids:
         relative=True
         )
     env._step()
-    while not env.instance_channel.data[id]['move_done']:
-        env._step()
-    while not env.instance_channel.data[id]['move_done']:
-        env._step()
+    env.wait_until(lambda: env.instance_channel.data[id]['move_done'])
     env.instance_channel.set_action(
         'IKTargetDoMove',
         id=id,
@@ -46,8 +42,9 @@ for id in ids:
         relative=True
         )
     env._step()
-    while not env.instance_channel.data[id]['move_done'] or not env.instance_channel.data[id]['rotate_done']:
-        env._step()
+    env.wait_until(
+        lambda: env.instance_channel.data[id]['move_done'] and env.instance_channel.data[id]['rotate_done']
+    )
 
 while 1:
     env._step()
\ No newline at end of file
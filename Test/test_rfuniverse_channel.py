@@ -0,0 +1,39 @@
+import struct
+
+import pytest
+
+from pyrfuniverse.rfuniverse_channel import InstanceChannel
+from pyrfuniverse.side_channel.side_channel import IncomingMessage, OutgoingMessage
+
+
+@pytest.fixture
+def channel():
+    channel = InstanceChannel('09bfcf57-9120-43dc-99f8-abeeec59df0f', None)
+    reply = OutgoingMessage()
+    reply.write_string('Opcodes')
+    reply.write_int32(2)
+    for name, opcode in [('SetActive', 3), ('SetTargetX', 7)]:
+        reply.write_string(name)
+        reply.write_int32(opcode)
+    channel.request_opcodes()
+    channel.on_message_received(IncomingMessage(bytes(reply.buffer)))
+    channel.message_queue = []
+    return channel
+
+
+def test_action_with_id_is_sent_with_opcode(channel):
+    channel.set_action('SetActive', id=42, active=True)
+    assert channel.message_queue == [struct.pack('<ii?', 42, -1 - 3, True)]
+
+
+def test_action_without_id_is_sent_with_opcode(channel):
+    channel.set_action('SetTargetX', targetx=0.5)
+    assert channel.message_queue == [struct.pack('<if', -1 - 7, 0.5)]
+
+
+def test_action_without_opcode_layout_is_sent_unchanged(channel, monkeypatch):
+    # Without its own offset, the name of SetTargetX is not where the object id would be, so it must be left alone.
+    monkeypatch.setattr(InstanceChannel, 'action_name_offsets', {})
+    channel.set_action('SetTargetX', targetx=0.5)
+    name = b'SetTargetX'
+    assert channel.message_queue == [struct.pack('<i', len(name)) + name + struct.pack('<f', 0.5)]
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from pyrfuniverse import rpc_utils
+from pyrfuniverse.base_env import ObservationSpec, ObservationType
+from pyrfuniverse.communicator_objects.agent_info_pb2 import AgentInfoProto
+from pyrfuniverse.communicator_objects.observation_pb2 import ObservationProto
+
+
+def make_agent_infos(values):
+    agent_infos = []
+    for row in values:
+        obs = ObservationProto(shape=[len(row)])
+        obs.float_data.data.extend(row)
+        agent_infos.append(AgentInfoProto(observations=[obs]))
+    return agent_infos
+
+
+@pytest.fixture(params=[False, True], ids=['python', 'native'])
+def protobuf_backend(request, monkeypatch):
+    # The native path only relies on the packed encoding, which both backends serialize the same way.
+    monkeypatch.setattr(rpc_utils, 'NATIVE_PROTOBUF', request.param)
+
+
+def test_observations_are_checked_once(protobuf_backend, monkeypatch):
+    values = np.arange(12, dtype=np.float32).reshape(3, 4)
+    # Blocks of two agents.
+    monkeypatch.setattr(rpc_utils, 'OBSERVATION_BLOCK_BYTES', 2 * 4 * values.shape[1])
+    spec = ObservationSpec(name='obs', shape=(4,), dimension_property=(), observation_type=ObservationType.DEFAULT)
+    checked = []
+    check = rpc_utils._raise_on_nan_and_inf
+
+    def counting_check(data, source):
+        checked.append(data.size)
+        return check(data, source)
+
+    monkeypatch.setattr(rpc_utils, '_raise_on_nan_and_inf', counting_check)
+    obs = rpc_utils._process_rank_one_or_two_observation(0, spec, make_agent_infos(values))
+
+    np.testing.assert_array_equal(obs, values)
+    # Every value is checked exactly once, as its block is converted, and never again in a pass over the batch.
+    assert checked == [8, 4]
+
+
+@pytest.mark.parametrize('bad_value, message', [(np.nan, 'NaN'), (np.inf, 'Infinite')])
+def test_observations_with_nan_or_inf_raise(protobuf_backend, bad_value, message):
+    values = np.zeros((2, 3), dtype=np.float32)
+    values[1, 2] = bad_value
+    spec = ObservationSpec(name='obs', shape=(3,), dimension_property=(), observation_type=ObservationType.DEFAULT)
+    with pytest.raises(RuntimeError, match=message):
+        rpc_utils._process_rank_one_or_two_observation(0, spec, make_agent_infos(values))
@@ -1,4 +1,6 @@
+import asyncio
 import atexit
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from distutils.version import StrictVersion
 
 import numpy as np
@@ -46,6 +48,7 @@ from pyrfuniverse.communicator_objects.unity_rl_initialization_input_pb2 import
 from pyrfuniverse.communicator_objects.unity_input_pb2 import UnityInputProto
 
 from .rpc_communicator import RpcCommunicator
+from .socket_communicator import SocketCommunicator, get_socket_path
 import signal
 
 logger = get_logger(__name__)
@@ -77,6 +80,13 @@ class UnityEnvironment(BaseEnv):
     # Command line argument used to pass the port to the executable environment.
     _PORT_COMMAND_LINE_ARG = "--mlagents-port"
 
+    # Command line argument used to pass the socket path to the executable environment
+    # when the socket communicator is used.
+    _SOCKET_COMMAND_LINE_ARG = "--rfuniverse-socket"
+
+    # Communicators that can be selected with the communicator argument.
+    COMMUNICATORS = {"grpc": RpcCommunicator, "socket": SocketCommunicator}
+
     @staticmethod
     def _raise_version_exception(unity_com_ver: str) -> None:
         raise UnityEnvironmentException(
@@ -152,6 +162,8 @@ class UnityEnvironment(BaseEnv):
         additional_args: Optional[List[str]] = None,
         side_channels: Optional[List[SideChannel]] = None,
         log_folder: Optional[str] = None,
+        uint8_visual_observations: bool = False,
+        communicator: str = "grpc",
     ):
         """
         Starts a new unity environment and establishes a connection with the environment.
@@ -167,6 +179,10 @@ class UnityEnvironment(BaseEnv):
         :list args: Addition Unity command line arguments
         :list side_channels: Additional side channel for no-rl communication with Unity
         :str log_folder: Optional folder to write the Unity Player log file into.  Requires absolute path.
+        :bool uint8_visual_observations: Whether compressed visual observations are returned as uint8 arrays of
+        pixel values in [0, 255] instead of float32 arrays in [0, 1].
+        :str communicator: "grpc" to communicate over a grpc server, or "socket" to use a Unix domain socket,
+        which is much faster when Unity runs on the same machine but needs support in the Unity build.
         """
         atexit.register(self._close)
         self._additional_args = additional_args or []
@@ -184,10 +200,22 @@ class UnityEnvironment(BaseEnv):
         # The process that is started. If None, no process was started
         self._process: Optional[subprocess.Popen] = None
         self._timeout_wait: int = timeout_wait
-        self._communicator = self._get_communicator(worker_id, base_port, timeout_wait)
+        # Exchange started by step_async() and its thread, created on first use.
+        self._pending_step: Optional[Future] = None
+        self._step_executor: Optional[ThreadPoolExecutor] = None
+        if communicator not in UnityEnvironment.COMMUNICATORS:
+            raise UnityEnvironmentException(
+                f"Unknown communicator {communicator}, "
+                f"expected one of {list(UnityEnvironment.COMMUNICATORS)}."
+            )
+        self._communicator_name = communicator
+        self._communicator = self._get_communicator(
+            worker_id, base_port, timeout_wait, communicator
+        )
         self._worker_id = worker_id
         self._side_channel_manager = SideChannelManager(side_channels)
         self._log_folder = log_folder
+        self._uint8_visual_observations = uint8_visual_observations
         self.academy_capabilities: UnityRLCapabilitiesProto = None  # type: ignore
 
         # If the environment name is None, a new environment will not be launched
@@ -248,14 +276,21 @@ class UnityEnvironment(BaseEnv):
         self.academy_capabilities = aca_params.capabilities
 
     @staticmethod
-    def _get_communicator(worker_id, base_port, timeout_wait):
-        return RpcCommunicator(worker_id, base_port, timeout_wait)
+    def _get_communicator(worker_id, base_port, timeout_wait, communicator="grpc"):
+        return UnityEnvironment.COMMUNICATORS[communicator](
+            worker_id, base_port, timeout_wait
+        )
 
     def _executable_args(self) -> List[str]:
         args: List[str] = []
         if self._no_graphics:
             args += ["-nographics", "-batchmode"]
         args += [UnityEnvironment._PORT_COMMAND_LINE_ARG, str(self._port)]
+        if self._communicator_name == "socket":
+            args += [
+                UnityEnvironment._SOCKET_COMMAND_LINE_ARG,
+                get_socket_path(self._port),
+            ]
 
         # If the logfile arg isn't already set in the env args,
         # try to set it to an output directory
@@ -289,7 +324,9 @@ class UnityEnvironment(BaseEnv):
             if brain_name in output.agentInfos:
                 agent_info_list = output.agentInfos[brain_name].value
                 self._env_state[brain_name] = steps_from_proto(
-                    agent_info_list, self._env_specs[brain_name]
+                    agent_info_list,
+                    self._env_specs[brain_name],
+                    self._uint8_visual_observations,
                 )
             else:
                 self._env_state[brain_name] = (
@@ -299,15 +336,12 @@ class UnityEnvironment(BaseEnv):
         self._side_channel_manager.process_side_channel_message(output.side_channel)
 
     def reset(self) -> None:
+        self._assert_no_pending_step()
         if self._loaded:
             outputs = self._communicator.exchange(
                 self._generate_reset_input(), self._poll_process
             )
-            if outputs is None:
-                raise UnityCommunicatorStoppedException("Communicator has exited.")
-            self._update_behavior_specs(outputs)
-            rl_output = outputs.rl_output
-            self._update_state(rl_output)
+            self._process_output(outputs)
             self._is_first_message = False
             self._env_actions.clear()
         else:
@@ -315,10 +349,70 @@ class UnityEnvironment(BaseEnv):
 
     @timed
     def step(self) -> None:
+        self._assert_no_pending_step()
         if self._is_first_message:
             return self.reset()
         if not self._loaded:
             raise UnityEnvironmentException("No Unity environment is loaded.")
+        self._fill_missing_actions()
+        step_input = self._generate_step_input(self._env_actions)
+        with hierarchical_timer("communicator.exchange"):
+            outputs = self._communicator.exchange(step_input, self._poll_process)
+        self._process_output(outputs)
+        self._env_actions.clear()
+
+    def step_async(self) -> None:
+        """
+        Sends the actions set so far to the environment and returns without waiting for the result, so that
+        other work can overlap with the simulation. step_wait() must be called before the next step.
+        Side channel messages queued before this call are sent with this step, later ones with the next step.
+        Actions set before step_wait() are used for the next step, get_steps() returns the previous state
+        until step_wait() is called.
+        """
+        self._assert_no_pending_step()
+        if not self._loaded:
+            raise UnityEnvironmentException("No Unity environment is loaded.")
+        if self._is_first_message:
+            unity_input = self._generate_reset_input()
+        else:
+            self._fill_missing_actions()
+            unity_input = self._generate_step_input(self._env_actions)
+        self._env_actions.clear()
+        if self._step_executor is None:
+            self._step_executor = ThreadPoolExecutor(max_workers=1)
+        self._pending_step = self._step_executor.submit(
+            self._communicator.exchange, unity_input, self._poll_process
+        )
+
+    @timed
+    def step_wait(self) -> None:
+        """
+        Waits for the step started by step_async() and updates the state of the environment with its result.
+        Side channel messages are processed here, in the calling thread.
+        """
+        if self._pending_step is None:
+            raise UnityEnvironmentException("step_async() must be called before step_wait().")
+        pending_step, self._pending_step = self._pending_step, None
+        with hierarchical_timer("communicator.exchange"):
+            outputs = pending_step.result()
+        self._process_output(outputs)
+        self._is_first_message = False
+
+    async def astep(self) -> None:
+        """
+        asyncio version of step(), other coroutines run while the environment is stepping.
+        """
+        self.step_async()
+        await asyncio.wrap_future(self._pending_step)
+        self.step_wait()
+
+    def _assert_no_pending_step(self) -> None:
+        if self._pending_step is not None:
+            raise UnityEnvironmentException(
+                "A step was started with step_async(), call step_wait() first."
+            )
+
+    def _fill_missing_actions(self) -> None:
         # fill the blanks for missing actions
         for group_name in self._env_specs:
             if group_name not in self._env_actions:
@@ -328,15 +422,27 @@ class UnityEnvironment(BaseEnv):
                 self._env_actions[group_name] = self._env_specs[
                     group_name
                 ].action_spec.empty_action(n_agents)
-        step_input = self._generate_step_input(self._env_actions)
-        with hierarchical_timer("communicator.exchange"):
-            outputs = self._communicator.exchange(step_input, self._poll_process)
+
+    def _process_output(self, outputs: Optional[UnityOutputProto]) -> None:
         if outputs is None:
             raise UnityCommunicatorStoppedException("Communicator has exited.")
         self._update_behavior_specs(outputs)
         rl_output = outputs.rl_output
         self._update_state(rl_output)
-        self._env_actions.clear()
+
+    def register_side_channel(self, side_channel: SideChannel) -> None:
+        """
+        Connects a side channel to the running environment, replacing the side channel with the same id if any.
+        :param side_channel: The side channel to connect.
+        """
+        self._side_channel_manager.register_side_channel(side_channel)
+
+    def unregister_side_channel(self, side_channel: SideChannel) -> None:
+        """
+        Disconnects a side channel from the running environment.
+        :param side_channel: The side channel to disconnect.
+        """
+        self._side_channel_manager.unregister_side_channel(side_channel)
 
     @property
     def behavior_specs(self) -> MappingType[str, BehaviorSpec]:
@@ -421,6 +527,13 @@ class UnityEnvironment(BaseEnv):
         if timeout is None:
             timeout = self._timeout_wait
         self._loaded = False
+        if self._pending_step is not None:
+            # Let the exchange started by step_async() finish before closing the communicator under it.
+            wait([self._pending_step], timeout=timeout)
+            self._pending_step = None
+        if self._step_executor is not None:
+            self._step_executor.shutdown(wait=False)
+            self._step_executor = None
         self._communicator.close()
         if self._process is not None:
             # Wait a bit for the process to shutdown, but kill it if it takes too long
@@ -1,6 +1,8 @@
 from pyrfuniverse.envs.base_env import RFUniverseBaseEnv
 from pyrfuniverse.envs.base_env import RFUniverseGymWrapper
 from pyrfuniverse.envs.base_env import RFUniverseGymGoalWrapper
+from pyrfuniverse.envs.vector_env import VectorRFUniverseEnv
+from pyrfuniverse.envs.unity_pool import UnityPool
 from pyrfuniverse.envs.franka_grasp_env import FrankaGraspEnv
 from pyrfuniverse.envs.franka_push_env import FrankaPushEnv
 from pyrfuniverse.envs.balance_ball_env import BalanceBallEnv
@@ -25,7 +27,7 @@ __all__ = [
     'RFUniverseGymWrapper', 'BalanceBallEnvV0', 'RFUniverseGymGoalWrapper',
     'BouncerEnv', 'BouncerEnvV0', 'RollerEnv', 'RollerEnvV0', 'NailCardEnv',
     'MultiAgentNavigationEnv', 'ToborRobotiq85ManipulationEnv', 'Ur5BoxEnv',
-    'Ur5DrawerEnv',
+    'Ur5DrawerEnv', 'VectorRFUniverseEnv', 'UnityPool',
 ]
 
 
@@ -1,76 +1,152 @@
 import time
 from abc import ABC
+from concurrent.futures import Future
+from contextlib import contextmanager
 from pyrfuniverse.environment import UnityEnvironment
 from pyrfuniverse.side_channel.environment_parameters_channel import EnvironmentParametersChannel
 from pyrfuniverse.rfuniverse_channel import AssetChannel
 from pyrfuniverse.rfuniverse_channel import InstanceChannel
 from pyrfuniverse.rfuniverse_channel import DebugChannel
+from pyrfuniverse.envs.preload import PreloadManifest, preload
 import gym
 import os
 import platform
 import json
+import socket
 from typing import Union
 
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
 
 def get_rfuniverse_log_dir():
     platform_name = platform.platform()
     assert 'Linux' in platform_name or 'Windows' in platform_name, \
         'Currently, we only support Linux and Windows.'
 
-    rfuniverse_log_dir = ''
-    curr_path = os.getcwd()
-
     if 'Linux' in platform_name:
-        paths = curr_path.split('/')
-        assert len(paths) >= 3 and paths[1] == 'home', \
-            'Invalid path. Please set your path to /home/USER_NAME/xxx'
-
-        rfuniverse_log_dir = '/home/{}/.rfuniverse'.format(paths[2])
+        rfuniverse_log_dir = os.path.join(os.path.expanduser('~'), '.rfuniverse')
     else:
-        rfuniverse_log_dir = os.path.join(curr_path, '.rfuniverse')
+        rfuniverse_log_dir = os.path.join(os.getcwd(), '.rfuniverse')
 
     return rfuniverse_log_dir
 
 
-def select_available_worker_id():
+@contextmanager
+def _locked_worker_id_log():
+    """
+    Open the worker id log with an exclusive lock, so that environments started in parallel (in any process)
+    never read or write it at the same time. Yields the file, opened for reading and writing.
+    """
     worker_id_log_dir = get_rfuniverse_log_dir()
-    if not os.path.exists(worker_id_log_dir):
-        os.makedirs(worker_id_log_dir)
+    os.makedirs(worker_id_log_dir, exist_ok=True)
     log_file = os.path.join(worker_id_log_dir, 'worker_id_log')
+    with open(log_file, 'a+') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            f.seek(0)
+            yield f
+        finally:
+            f.flush()
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _read_worker_ids(f) -> dict:
+    """
+    Read the worker id log, one 'worker_id pid' line per worker id in use. Returns a dict from worker id to pid.
+    Lines written by older versions have no pid, they are kept as -1 and treated as stale.
+    """
+    worker_ids = {}
+    for line in f.read().splitlines():
+        fields = line.split()
+        if len(fields) == 0:
+            continue
+        worker_ids[int(fields[0])] = int(fields[1]) if len(fields) > 1 else -1
+    return worker_ids
+
+
+def _write_worker_ids(f, worker_ids: dict) -> None:
+    f.seek(0)
+    f.truncate()
+    for worker_id, pid in sorted(worker_ids.items()):
+        f.write('{} {}\n'.format(worker_id, pid))
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    if os.name == 'nt':
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        # PROCESS_QUERY_LIMITED_INFORMATION, os.kill() would terminate the process on Windows.
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        # STILL_ACTIVE
+        return exit_code.value == 259
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _port_available(port: int) -> bool:
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if platform.system() == 'Linux':
+        # Same check as RpcCommunicator.check_port.
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        s.bind(('localhost', port))
+    except OSError:
+        return False
+    finally:
+        s.close()
+    return True
+
 
-    worker_id = 1
-    worker_id_in_use = []
-    if os.path.exists(log_file):
-        with open(log_file, 'r') as f:
-            worker_ids = f.readlines()
-            for line in worker_ids:
-                worker_id_in_use.append(int(line))
-        while worker_id in worker_id_in_use:
+def select_available_worker_id():
+    """
+    Reserve the smallest worker id that is neither reserved by a running process nor has its port taken. Ids
+    reserved by processes that died without calling delete_worker_id() are reclaimed.
+    """
+    with _locked_worker_id_log() as f:
+        worker_ids = _read_worker_ids(f)
+        worker_ids = {worker_id: pid for worker_id, pid in worker_ids.items() if _pid_alive(pid)}
+
+        worker_id = 1
+        while worker_id in worker_ids or \
+                not _port_available(UnityEnvironment.BASE_ENVIRONMENT_PORT + worker_id):
             worker_id += 1
 
-    worker_id_in_use.append(worker_id)
-    with open(log_file, 'w') as f:
-        for id in worker_id_in_use:
-            f.write(str(id) + '\n')
+        worker_ids[worker_id] = os.getpid()
+        _write_worker_ids(f, worker_ids)
 
     return worker_id
 
 
 def delete_worker_id(worker_id):
-    worker_id_log_dir = get_rfuniverse_log_dir()
-    log_file = os.path.join(worker_id_log_dir, 'worker_id_log')
-
-    worker_id_in_use = []
-    if os.path.exists(log_file):
-        with open(log_file, 'r') as f:
-            worker_ids = f.readlines()
-            for line in worker_ids:
-                worker_id_in_use.append(int(line))
-
-    worker_id_in_use.remove(worker_id)
-    with open(log_file, 'w') as f:
-        for id in worker_id_in_use:
-            f.write(str(id) + '\n')
+    with _locked_worker_id_log() as f:
+        worker_ids = _read_worker_ids(f)
+        worker_ids.pop(worker_id, None)
+        _write_worker_ids(f, worker_ids)
 
 
 class RFUniverseBaseEnv(ABC):
@@ -97,18 +173,36 @@ class RFUniverseBaseEnv(ABC):
     ):
         # time step
         self.t = 0
-        self.worker_id = select_available_worker_id()
-        # initialize rfuniverse channels
-        self.channels = custom_channels.copy()
-        self._init_channels(kwargs)
-        self.assets = assets
-        # initialize environment
-        self.executable_file = executable_file
-        self.scene_file = scene_file
-        self._init_env()
+        # A UnityPool lends a running player with the scene and assets already loaded.
+        self.pool = kwargs.get('pool', None)
+        self.player = self.pool.lease() if self.pool is not None else None
+        try:
+            self.worker_id = self.player.worker_id if self.player is not None else select_available_worker_id()
+            self.preload_manifest = self.player.preload_manifest if self.player is not None else PreloadManifest()
+            self.preload_timeout = kwargs.get('preload_timeout', None)
+            self.preload_progress = kwargs.get('preload_progress', None)
+            # Whether the Unity build can advance several frames in one step, see _step().
+            self.multi_frame_step = kwargs.get('multi_frame_step', False)
+            # initialize rfuniverse channels
+            self.channels = custom_channels.copy()
+            self._init_channels(kwargs)
+            self.assets = assets
+            # initialize environment
+            self.executable_file = executable_file
+            self.scene_file = scene_file
+            self._init_env()
+        except BaseException:
+            # The player may be half set up, let the pool replace it rather than lend it again.
+            if self.player is not None:
+                self.pool.release(self.player, healthy=False)
+                self.player = None
+            raise
 
     def _init_env(self):
-        if self.executable_file is not None:
+        if self.player is not None:
+            self.env = self.player.env
+            self.player.connect(self.channels)
+        elif self.executable_file is not None:
             self.env = UnityEnvironment(
                 worker_id=self.worker_id,
                 file_name=self.executable_file,
@@ -120,18 +214,23 @@ class RFUniverseBaseEnv(ABC):
                 side_channels=self.channels
             )
 
-        if self.scene_file is not None:
-            self.asset_channel.LoadSceneAsync(self.scene_file)
-            self.asset_channel.done = False
-            while not self.asset_channel.done:
-                self._step()
-        if len(self.assets) > 0:
-            self.asset_channel.PreLoadAssetsAsync(self.assets)
-            self.asset_channel.done = False
-            while not self.asset_channel.done:
-                self._step()
+        self.preload(self.scene_file, self.assets, self.preload_timeout, self.preload_progress)
         self.env.reset()
 
+    def preload(self, scene_file: str = None, assets: list = [], timeout: float = None, progress_callback=None):
+        """
+        Load a scene and preload assets, skipping what this Unity player has already loaded.
+
+        Args:
+            scene_file: Str. Optional. The scene to load.
+            assets: List. Optional. Asset names, or lists of asset names which are requested as independent batches
+                and loaded concurrently.
+            timeout: Float. Optional. Seconds to wait for the scene, then for the assets, before raising
+                UnityTimeOutException.
+            progress_callback: Optional. Called with (done, total) each time a request completes.
+        """
+        preload(self.env, self.asset_channel, self.preload_manifest, scene_file, assets, timeout, progress_callback)
+
     def _init_channels(self, kwargs: dict):
         # Compulsory channels
         # Environment parameters channel
@@ -139,14 +238,75 @@ class RFUniverseBaseEnv(ABC):
         self.channels.append(self.env_param_channel)
         # Asset channel
         self.asset_channel = AssetChannel(self.rfuniverse_channel_ids['asset_channel'])
-        self.instance_channel = InstanceChannel(self.rfuniverse_channel_ids['instance_channel'], self)
+        self.instance_channel = InstanceChannel(
+            self.rfuniverse_channel_ids['instance_channel'],
+            self,
+            columnar=kwargs.get('columnar_state', False),
+            lazy=kwargs.get('lazy_state', False),
+            decode_images=kwargs.get('decode_images', False)
+        )
         self.debug_channel = DebugChannel(self.rfuniverse_channel_ids['debug_channel'])
+        if kwargs.get('raw_image_payload', False):
+            # Sent with the first step, Unity builds without support keep using base64 strings.
+            self.asset_channel.set_action('EnableRawBytesPayload', enabled=True)
+        if kwargs.get('action_opcodes', False):
+            # Actions are sent with integer opcodes once Unity replied with them, see RFUniverseChannel.
+            self.asset_channel.request_opcodes()
+            self.instance_channel.request_opcodes()
         self.channels.append(self.asset_channel)
         self.channels.append(self.instance_channel)
         self.channels.append(self.debug_channel)
 
-    def _step(self):
-        self.env.step()
+    def _step(self, frames: int = 1):
+        """
+        Step the environment by a number of frames. When multi_frame_step was enabled, Unity advances all the frames
+        before replying, so this takes one exchange; otherwise the environment is stepped once per frame. Either
+        way, actions set before this call are sent with the first frame and the state after the last frame is
+        received.
+
+        Args:
+            frames: Int. The number of frames to advance.
+        """
+        if frames > 1 and self.multi_frame_step:
+            self.asset_channel.set_action('StepFrames', frames=frames)
+            self.env.step()
+        else:
+            for _ in range(frames):
+                self.env.step()
+
+    def wait_until(
+            self, predicate, max_steps: int = None, timeout: float = None, frames_per_step: int = 1
+    ) -> bool:
+        """
+        Step the environment until predicate() is true, instead of polling a completion flag in a loop.
+
+        Args:
+            predicate: Callable returning a bool, or a Future such as one returned by a channel's future(). A
+                KeyError raised by the callable, while the data it reads has not been received yet, counts as False.
+            max_steps: Int. Optional. The maximum number of steps to wait.
+            timeout: Float. Optional. The maximum number of seconds to wait.
+            frames_per_step: Int. Optional. The number of frames of each step, see _step(). predicate is only
+                checked between steps.
+
+        Returns:
+            True once predicate is true, False if max_steps or timeout was reached first.
+        """
+        if isinstance(predicate, Future):
+            predicate = predicate.done
+        deadline = None if timeout is None else time.monotonic() + timeout
+        steps = 0
+        while True:
+            try:
+                if predicate():
+                    return True
+            except KeyError:
+                pass
+            if max_steps is not None and steps >= max_steps:
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            self._step(frames_per_step)
+            steps += 1
 
     def render(
             self,
@@ -198,6 +358,11 @@ class RFUniverseBaseEnv(ABC):
         return img
 
     def close(self):
+        self.instance_channel.close()
+        if self.player is not None:
+            self.pool.release(self.player)
+            self.player = None
+            return
         delete_worker_id(self.worker_id)
         self.env.close()
 
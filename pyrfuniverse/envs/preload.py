@@ -0,0 +1,83 @@
+import time
+from typing import Callable, Optional
+
+from pyrfuniverse.environment import UnityEnvironment
+from pyrfuniverse.exception import UnityTimeOutException
+from pyrfuniverse.rfuniverse_channel import AssetChannel
+
+
+class PreloadManifest:
+    """
+    What a Unity player has loaded so far: its scene and its preloaded assets. It lives as long as the player, so
+    that resetting or re-initializing an environment on the same player (for example a pooled one) only loads
+    what is missing.
+    """
+
+    def __init__(self):
+        self.scene_file = None
+        self.assets = set()
+
+    def missing_assets(self, assets: list) -> list:
+        return [asset for asset in assets if asset not in self.assets]
+
+
+def preload(
+    env: UnityEnvironment,
+    asset_channel: AssetChannel,
+    manifest: PreloadManifest,
+    scene_file: str = None,
+    assets: list = [],
+    timeout: Optional[float] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> None:
+    """
+    Load a scene and preload assets in a Unity player, skipping what the manifest says is already loaded. The
+    scene is loaded first, then every batch of assets is requested at once and Unity loads them concurrently.
+
+    Args:
+        env: The UnityEnvironment of the player.
+        asset_channel: The asset channel connected to the player.
+        manifest: The PreloadManifest of the player, updated once loading is done.
+        scene_file: Str. Optional. The scene to load.
+        assets: List. Optional. Asset names, or lists of asset names to request as independent batches.
+        timeout: Float. Optional. Seconds to wait for each stage before raising UnityTimeOutException, wait forever
+            if None.
+        progress_callback: Optional. Called with (done, total) each time a request completes.
+    """
+    batches = [batch for batch in assets if isinstance(batch, (list, tuple))]
+    if len(batches) < len(assets):
+        batches.append([asset for asset in assets if not isinstance(asset, (list, tuple))])
+    batches = [manifest.missing_assets(batch) for batch in batches]
+    batches = [batch for batch in batches if len(batch) > 0]
+
+    load_scene = scene_file is not None and scene_file != manifest.scene_file
+    total = int(load_scene) + len(batches)
+    done = 0
+    if load_scene:
+        asset_channel.LoadSceneAsync(scene_file)
+        done = _wait_done(env, asset_channel, 1, done, total, timeout, progress_callback)
+        manifest.scene_file = scene_file
+    if len(batches) > 0:
+        for batch in batches:
+            asset_channel.PreLoadAssetsAsync(batch)
+        _wait_done(env, asset_channel, len(batches), done, total, timeout, progress_callback)
+        for batch in batches:
+            manifest.assets.update(batch)
+
+
+def _wait_done(env, asset_channel, count, done, total, timeout, progress_callback) -> int:
+    target = asset_channel.done_count + count
+    deadline = None if timeout is None else time.monotonic() + timeout
+    asset_channel.done = False
+    while asset_channel.done_count < target:
+        if deadline is not None and time.monotonic() > deadline:
+            raise UnityTimeOutException(
+                'Unity did not finish loading in {} seconds ({} of {} requests done).'.format(timeout, done, total)
+            )
+        before = asset_channel.done_count
+        env.step()
+        for _ in range(min(asset_channel.done_count, target) - before):
+            done += 1
+            if progress_callback is not None:
+                progress_callback(done, total)
+    return done
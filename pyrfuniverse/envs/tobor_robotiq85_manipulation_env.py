@@ -1,4 +1,5 @@
 from pyrfuniverse.envs import RFUniverseBaseEnv
+from pyrfuniverse.exception import UnityCommunicationException
 from pyrfuniverse.utils import RFUniverseToborController
 import numpy as np
 import math
@@ -12,11 +13,15 @@ class ToborRobotiq85ManipulationEnv(RFUniverseBaseEnv):
             scene_file=None,
             only_calculate=False,
             left_init_joint_positions=[0] * 7,
-            right_init_joint_positions=[0] * 7
+            right_init_joint_positions=[0] * 7,
+            multi_frame_step=False,
+            stream_trajectories=False,
+            time_step=0.02
     ):
         super().__init__(
             executable_file='/home/yanbing/Project/rfuniverse/rfuniverse/Build/RFUniverse.x86_64',
             scene_file=scene_file,
+            multi_frame_step=multi_frame_step,
         )
         self.instance_channel.set_action(
             'EnabledNativeIK',
@@ -49,6 +54,10 @@ class ToborRobotiq85ManipulationEnv(RFUniverseBaseEnv):
         self.task_name = task_name
         self.record_file = '/home/haoyuan/workspace/rfuniverse/rfuniverse/RFUniverse/tobor_manipulation_{}.txt'.format(self.task_name)
         self.only_calculate = only_calculate
+        # Whether step() and double_step() send each motion as one trajectory instead of one waypoint per step,
+        # timed with the fixed time step of the Unity build.
+        self.stream_trajectories = stream_trajectories
+        self.time_step = time_step
         #with open(self.record_file, 'w') as f:
             #f.close()
 
@@ -64,6 +73,20 @@ class ToborRobotiq85ManipulationEnv(RFUniverseBaseEnv):
         time_steps = int(np.abs(distance / 0.05).max()) + 1
         unit_distance = distance / time_steps
 
+        if self.stream_trajectories and not self.only_calculate:
+            target_positions = current_position + unit_distance * np.arange(1, time_steps + 1)[:, None]
+            joint_positions = self.ik_controller.calculate_ik_batch(mode, target_positions, orientation)
+            times = self._waypoint_times(time_steps)
+            if mode == 'left':
+                self.left_joint_positions = joint_positions[-1]
+                future = self.instance_channel.follow_trajectory(9874610, times, joint_positions)
+            else:
+                self.right_joint_positions = joint_positions[-1]
+                future = self.instance_channel.follow_trajectory(9874611, times, joint_positions)
+            self._wait_for_trajectory(future, time_steps)
+            self.write()
+            return
+
         for i in range(time_steps):
             target_position = current_position + unit_distance * (i + 1)
             joint_positions = self.ik_controller.calculate_ik(
@@ -89,10 +112,9 @@ class ToborRobotiq85ManipulationEnv(RFUniverseBaseEnv):
                         joint_positions=list(joint_positions),
                     )
 
-            for j in range(20):
-                if not self.only_calculate:
-                    self._step()
-                self.write()
+            if not self.only_calculate:
+                self._step(frames=20)
+            self.write()
 
 
     def double_step(self, left_pos, right_pos, left_orn=None, right_orn=None):
@@ -108,6 +130,21 @@ class ToborRobotiq85ManipulationEnv(RFUniverseBaseEnv):
         left_unit_distance = left_distance / time_steps
         right_unit_distance = right_distance / time_steps
 
+        if self.stream_trajectories and not self.only_calculate:
+            steps = np.arange(1, time_steps + 1)[:, None]
+            left_joint_positions = self.ik_controller.calculate_ik_batch(
+                'left', left_current_pos + left_unit_distance * steps, left_orn)
+            right_joint_positions = self.ik_controller.calculate_ik_batch(
+                'right', right_current_pos + right_unit_distance * steps, right_orn)
+            self.left_joint_positions = left_joint_positions[-1]
+            self.right_joint_positions = right_joint_positions[-1]
+            times = self._waypoint_times(time_steps)
+            left_future = self.instance_channel.follow_trajectory(9874610, times, left_joint_positions)
+            right_future = self.instance_channel.follow_trajectory(9874611, times, right_joint_positions)
+            self._wait_for_trajectory(lambda: left_future.done() and right_future.done(), time_steps)
+            self.write()
+            return
+
         for i in range(time_steps):
             left_target_position = left_current_pos + left_unit_distance * (i + 1)
             right_target_position = right_current_pos + right_unit_distance * (i + 1)
@@ -137,10 +174,20 @@ class ToborRobotiq85ManipulationEnv(RFUniverseBaseEnv):
                     joint_positions=list(right_joint_positions),
                 )
 
-            for j in range(20):
-                if not self.only_calculate:
-                    self._step()
-                self.write()
+            if not self.only_calculate:
+                self._step(frames=20)
+            self.write()
+
+    def _waypoint_times(self, time_steps):
+        # Each waypoint takes the 20 frames step() waits for it otherwise.
+        return np.arange(1, time_steps + 1) * 20 * self.time_step
+
+    def _wait_for_trajectory(self, predicate, time_steps, max_trajectory_lengths=3):
+        # Each step lasts the whole trajectory, give up after a few of them.
+        if not self.wait_until(predicate, max_steps=max_trajectory_lengths, frames_per_step=20 * time_steps):
+            raise UnityCommunicationException(
+                'The trajectory of {} waypoints was not done after {} times its duration.'.format(
+                    time_steps, max_trajectory_lengths))
 
     def double_close(self):
         if not self.only_calculate:
@@ -159,10 +206,9 @@ class ToborRobotiq85ManipulationEnv(RFUniverseBaseEnv):
             self.right_gripper_open = False
             self._step()
 
-        for i in range(20):
-            if not self.only_calculate:
-                self._step()
-            self.write()
+        if not self.only_calculate:
+            self._step(frames=20)
+        self.write()
 
     def double_open(self):
         if not self.only_calculate:
@@ -181,10 +227,9 @@ class ToborRobotiq85ManipulationEnv(RFUniverseBaseEnv):
             self.right_gripper_open = True
             self._step()
 
-        for i in range(20):
-            if not self.only_calculate:
-                self._step()
-            self.write()
+        if not self.only_calculate:
+            self._step(frames=20)
+        self.write()
 
     def reset(self):
         self.env.reset()
@@ -217,10 +262,9 @@ class ToborRobotiq85ManipulationEnv(RFUniverseBaseEnv):
                     joint_positions=[50, 50],
                 )
                 self.right_gripper_open = False
-        for i in range(20):
-            if not self.only_calculate:
-                self._step()
-            self.write()
+        if not self.only_calculate:
+            self._step(frames=20)
+        self.write()
 
 
     def open_gripper(self, mode):
@@ -239,17 +283,15 @@ class ToborRobotiq85ManipulationEnv(RFUniverseBaseEnv):
                     joint_positions=[0, 0],
                 )
                 self.right_gripper_open = True
-        for i in range(20):
-            if not self.only_calculate:
-                self._step()
-            self.write()
+        if not self.only_calculate:
+            self._step(frames=20)
+        self.write()
 
 
     def wait(self, n_timesteps):
-        for i in range(n_timesteps):
-            if not self.only_calculate:
-                self._step()
-            self.write()
+        if not self.only_calculate:
+            self._step(frames=n_timesteps)
+        self.write()
 
 
     def write(self):
@@ -0,0 +1,211 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pyrfuniverse.environment import UnityEnvironment
+from pyrfuniverse.envs.base_env import RFUniverseBaseEnv, select_available_worker_id, delete_worker_id
+from pyrfuniverse.envs.preload import PreloadManifest, preload
+from pyrfuniverse.exception import UnityEnvironmentException
+from pyrfuniverse.logging_util import get_logger
+from pyrfuniverse.rfuniverse_channel import AssetChannel
+
+logger = get_logger(__name__)
+
+
+class UnityPlayer:
+    """
+    A Unity player kept warm by a UnityPool: its UnityEnvironment, its worker id, the asset channel the pool
+    used to load the scene and assets, and the manifest of what is loaded. An environment leasing the player
+    connects its own side channels to it, they are disconnected when the player is released.
+    """
+
+    def __init__(
+        self, env: UnityEnvironment, worker_id: int, asset_channel: AssetChannel, preload_manifest: PreloadManifest
+    ):
+        self.env = env
+        self.worker_id = worker_id
+        self.asset_channel = asset_channel
+        self.preload_manifest = preload_manifest
+        self.leased_channels = []
+
+    def connect(self, channels: list) -> None:
+        """
+        Connect the side channels of the environment leasing this player.
+        """
+        for channel in channels:
+            self.env.register_side_channel(channel)
+        self.leased_channels = list(channels)
+
+    def disconnect(self) -> None:
+        for channel in self.leased_channels:
+            self.env.unregister_side_channel(channel)
+        self.leased_channels = []
+        self.env.register_side_channel(self.asset_channel)
+
+    def is_alive(self) -> bool:
+        process = self.env._process
+        return self.env._loaded and (process is None or process.poll() is None)
+
+    def close(self) -> None:
+        try:
+            self.env.close()
+        finally:
+            delete_worker_id(self.worker_id)
+
+
+class UnityPool:
+    """
+    Keeps a number of Unity players running, with the scene and assets already loaded, so that environments can
+    lease a player instead of launching and loading a new one. Pass the pool to an environment with the pool
+    keyword argument; closing the environment returns the player to the pool. Players that died are replaced in
+    the background, so a crashed environment can be recreated right away.
+    """
+
+    def __init__(
+        self,
+        executable_file: str,
+        size: int = 1,
+        scene_file: str = None,
+        assets: list = [],
+        preload_timeout: float = None,
+        **kwargs
+    ):
+        """
+        Args:
+            executable_file: Str. The Unity player to launch.
+            size: Int. The number of players kept running.
+            scene_file: Str. Optional. The scene loaded in every player.
+            assets: List. Optional. The assets preloaded in every player.
+            preload_timeout: Float. Optional. Seconds to wait for the scene, then for the assets, of each player.
+            kwargs: Other arguments of UnityEnvironment, such as no_graphics or communicator.
+        """
+        self.executable_file = executable_file
+        self.size = size
+        self.scene_file = scene_file
+        self.assets = assets
+        self.preload_timeout = preload_timeout
+        self.env_kwargs = kwargs
+        self.idle = queue.Queue()
+        self.players = []
+        self.lock = threading.Lock()
+        self.closed = False
+        # Number of players being warmed in the background to replace dead ones.
+        self.replacing = 0
+        self.executor = ThreadPoolExecutor(max_workers=size)
+        # Players are launched and warmed concurrently.
+        futures = [self.executor.submit(self._warm_player) for _ in range(size)]
+        players = []
+        error = None
+        for future in futures:
+            try:
+                players.append(future.result())
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            # Don't leak the players which did start.
+            self.executor.shutdown(wait=True)
+            for player in players:
+                player.close()
+            raise error
+        for player in players:
+            self._add_player(player)
+
+    def _warm_player(self) -> UnityPlayer:
+        worker_id = select_available_worker_id()
+        asset_channel = AssetChannel(RFUniverseBaseEnv.rfuniverse_channel_ids['asset_channel'])
+        try:
+            env = UnityEnvironment(
+                worker_id=worker_id,
+                file_name=self.executable_file,
+                side_channels=[asset_channel],
+                **self.env_kwargs
+            )
+        except Exception:
+            delete_worker_id(worker_id)
+            raise
+        preload_manifest = PreloadManifest()
+        try:
+            preload(env, asset_channel, preload_manifest, self.scene_file, self.assets, self.preload_timeout)
+            env.reset()
+        except Exception:
+            env.close()
+            delete_worker_id(worker_id)
+            raise
+        return UnityPlayer(env, worker_id, asset_channel, preload_manifest)
+
+    def _add_player(self, player: UnityPlayer) -> None:
+        with self.lock:
+            if self.closed:
+                player.close()
+                return
+            self.players.append(player)
+        self.idle.put(player)
+
+    def _replace(self, player: UnityPlayer) -> None:
+        with self.lock:
+            if player in self.players:
+                self.players.remove(player)
+        try:
+            player.close()
+        except Exception:
+            pass
+        with self.lock:
+            if self.closed:
+                return
+            self.replacing += 1
+        future = self.executor.submit(lambda: self._add_player(self._warm_player()))
+        future.add_done_callback(self._on_replaced)
+
+    def _on_replaced(self, future) -> None:
+        with self.lock:
+            self.replacing -= 1
+        error = future.exception()
+        if error is not None:
+            logger.error('Could not replace a Unity player of the pool: {}'.format(error))
+            # Wake up a lease() waiting for this player, it raises the error.
+            self.idle.put(error)
+
+    def lease(self, timeout: float = None) -> UnityPlayer:
+        """
+        Take an idle player, waiting for one to be released or replaced if there is none.
+
+        Args:
+            timeout: Float. Optional. Seconds to wait before raising UnityEnvironmentException, wait forever if None.
+        """
+        while True:
+            with self.lock:
+                if self.closed:
+                    raise UnityEnvironmentException('The Unity pool is closed.')
+                if len(self.players) == 0 and self.replacing == 0 and self.idle.empty():
+                    raise UnityEnvironmentException('Every Unity player of the pool failed.')
+            try:
+                player = self.idle.get(timeout=timeout)
+            except queue.Empty:
+                raise UnityEnvironmentException('No Unity player was released in {} seconds.'.format(timeout))
+            if isinstance(player, BaseException):
+                raise UnityEnvironmentException('Could not replace a Unity player of the pool.') from player
+            if player.is_alive():
+                return player
+            self._replace(player)
+
+    def release(self, player: UnityPlayer, healthy: bool = True) -> None:
+        """
+        Return a leased player to the pool.
+
+        Args:
+            player: The leased player.
+            healthy: Bool. If False, the player is closed and a new one is warmed in its place.
+        """
+        player.disconnect()
+        if healthy and player.is_alive() and not self.closed:
+            self.idle.put(player)
+        else:
+            self._replace(player)
+
+    def close(self) -> None:
+        with self.lock:
+            self.closed = True
+            players, self.players = self.players, []
+        self.executor.shutdown(wait=True)
+        for player in players:
+            player.close()
@@ -0,0 +1,220 @@
+import multiprocessing
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Sequence
+
+import numpy as np
+
+from pyrfuniverse.exception import UnityEnvironmentException
+
+
+def _step_and_reset(env, action):
+    """
+    Step one environment, resetting it when its episode is done. The last observation of the episode is kept in
+    info['terminal_observation'].
+    """
+    obs, reward, done, info = env.step(action)
+    if done:
+        info = dict(info)
+        info['terminal_observation'] = obs
+        obs = env.reset()
+    return obs, reward, done, info
+
+
+def _worker(remote, parent_remote, env_fn):
+    # Every reply is ('ok', result) or ('error', traceback), so that exceptions are raised again in the parent.
+    parent_remote.close()
+    env = None
+    try:
+        try:
+            env = env_fn()
+        except Exception:
+            # The parent waits for every environment to start, it closes the others and raises this one.
+            remote.send(('error', traceback.format_exc()))
+            return
+        remote.send(('ok', None))
+        while True:
+            command, data = remote.recv()
+            if command == 'close':
+                break
+            try:
+                if command == 'step':
+                    result = _step_and_reset(env, data)
+                elif command == 'reset':
+                    result = env.reset()
+                elif command == 'call':
+                    name, args, kwargs = data
+                    result = getattr(env, name)(*args, **kwargs)
+                else:
+                    raise ValueError('Unknown command {}.'.format(command))
+            except Exception:
+                remote.send(('error', traceback.format_exc()))
+            else:
+                remote.send(('ok', result))
+    finally:
+        if env is not None:
+            env.close()
+        remote.close()
+
+
+def _receive(remotes) -> list:
+    """
+    Receive the reply of every subprocess, then raise the first exception any of them reported. Every reply is
+    read first, so the pipes stay in step for the next command.
+    """
+    replies = [remote.recv() for remote in remotes]
+    for index, (status, result) in enumerate(replies):
+        if status == 'error':
+            raise UnityEnvironmentException('Environment {} raised an exception:\n{}'.format(index, result))
+    return [result for _, result in replies]
+
+
+def stack_observations(observations: list):
+    """
+    Stack the observations of every environment along a new first axis. Dict observations, such as those of goal
+    environments, are stacked key by key.
+    """
+    if isinstance(observations[0], dict):
+        return {key: stack_observations([obs[key] for obs in observations]) for key in observations[0]}
+    return np.stack([np.asarray(obs) for obs in observations])
+
+
+class VectorRFUniverseEnv:
+    """
+    Runs N RFUniverse environments, each with its own Unity process, and steps all of them concurrently. Actions are
+    given as one array with a row per environment, and observations, rewards and dones come back stacked in the
+    same order. An environment whose episode is done is reset right away, its last observation is kept in
+    info['terminal_observation'].
+
+    Environments are created by env_fns, for example `lambda: FrankaReachEnv(executable_file=...)`. Each one picks
+    its own worker id, so their ports don't collide. By default they live in this process and are stepped from a
+    thread pool, which overlaps the time spent waiting on Unity. With use_subprocess=True each environment lives in
+    its own process instead, which also spreads the Python side of step() across cores.
+    """
+
+    # Seconds close() waits for each subprocess before terminating it.
+    close_timeout = 10
+
+    def __init__(self, env_fns: Sequence[Callable], use_subprocess: bool = False, start_method: str = None):
+        """
+        Args:
+            env_fns: Functions creating one environment each. They must be picklable when use_subprocess is True and
+                the start method is not 'fork'.
+            use_subprocess: Whether each environment lives in its own process.
+            start_method: Optional. The multiprocessing start method of the subprocesses.
+        """
+        assert len(env_fns) > 0, 'VectorRFUniverseEnv needs at least one environment.'
+        self.num_envs = len(env_fns)
+        self.use_subprocess = use_subprocess
+        self.closed = False
+        if use_subprocess:
+            ctx = multiprocessing.get_context(start_method)
+            pipes = [ctx.Pipe() for _ in range(self.num_envs)]
+            self.remotes = [parent for parent, _ in pipes]
+            self.processes = []
+            for (parent, child), env_fn in zip(pipes, env_fns):
+                process = ctx.Process(target=_worker, args=(child, parent, env_fn), daemon=True)
+                process.start()
+                child.close()
+                self.processes.append(process)
+            self.envs = []
+            try:
+                # Each worker replies once its environment is created.
+                _receive(self.remotes)
+            except Exception:
+                self.close()
+                raise
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=self.num_envs)
+            # Unity processes can be launched concurrently too.
+            futures = [self.executor.submit(env_fn) for env_fn in env_fns]
+            self.envs = []
+            error = None
+            for future in futures:
+                try:
+                    self.envs.append(future.result())
+                except Exception as e:
+                    error = error or e
+            if error is not None:
+                # Don't leave the environments which did start running.
+                self.close()
+                raise error
+
+    def reset(self):
+        """
+        Reset every environment.
+
+        Returns:
+            The stacked observations.
+        """
+        if self.use_subprocess:
+            for remote in self.remotes:
+                remote.send(('reset', None))
+            observations = _receive(self.remotes)
+        else:
+            observations = list(self.executor.map(lambda env: env.reset(), self.envs))
+        return stack_observations(observations)
+
+    def step(self, actions):
+        """
+        Step every environment with its row of actions.
+
+        Args:
+            actions: Array-like with one action per environment along the first axis.
+
+        Returns:
+            The stacked observations, a float32 (N,) array of rewards, a bool (N,) array of dones and a list of infos.
+        """
+        assert len(actions) == self.num_envs, \
+            'Expected {} actions but got {}.'.format(self.num_envs, len(actions))
+        if self.use_subprocess:
+            for remote, action in zip(self.remotes, actions):
+                remote.send(('step', action))
+            results = _receive(self.remotes)
+        else:
+            results = list(self.executor.map(_step_and_reset, self.envs, actions))
+        observations, rewards, dones, infos = zip(*results)
+        return (
+            stack_observations(observations),
+            np.array(rewards, dtype=np.float32),
+            np.array(dones, dtype=bool),
+            list(infos),
+        )
+
+    def call(self, name: str, *args, **kwargs) -> List:
+        """
+        Call a method of every environment concurrently.
+
+        Args:
+            name: Name of the method.
+
+        Returns:
+            The result of each environment.
+        """
+        if self.use_subprocess:
+            for remote in self.remotes:
+                remote.send(('call', (name, args, kwargs)))
+            return _receive(self.remotes)
+        return list(self.executor.map(lambda env: getattr(env, name)(*args, **kwargs), self.envs))
+
+    def close(self):
+        if self.closed:
+            return
+        if self.use_subprocess:
+            for remote in self.remotes:
+                try:
+                    remote.send(('close', None))
+                except (BrokenPipeError, EOFError):
+                    # The worker already died.
+                    pass
+            for process in self.processes:
+                process.join(self.close_timeout)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+            for remote in self.remotes:
+                remote.close()
+        else:
+            list(self.executor.map(lambda env: env.close(), self.envs))
+            self.executor.shutdown()
+        self.closed = True
@@ -1,9 +1,10 @@
 from pyrfuniverse.rfuniverse_channel.rfuniverse_channel import RFUniverseChannel
+from pyrfuniverse.rfuniverse_channel.instance_state import InstanceStateStore
 from pyrfuniverse.rfuniverse_channel.instance_channel import InstanceChannel
 from pyrfuniverse.rfuniverse_channel.asset_channel import AssetChannel
 from pyrfuniverse.rfuniverse_channel.debug_channel import DebugChannel
 
 
 __all__ = [
-    'RFUniverseChannel', 'InstanceChannel', 'AssetChannel', 'DebugChannel'
+    'RFUniverseChannel', 'InstanceChannel', 'InstanceStateStore', 'AssetChannel', 'DebugChannel'
 ]
\ No newline at end of file
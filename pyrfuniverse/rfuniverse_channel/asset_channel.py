@@ -10,6 +10,8 @@ class AssetChannel(RFUniverseChannel):
     def __init__(self, channel_id: str) -> None:
         super().__init__(channel_id)
         self.done = False
+        # Number of 'PreLoad Done' received, one per LoadSceneAsync or PreLoadAssetsAsync sent.
+        self.done_count = 0
         self.data = {}
 
     def _parse_message(self, msg: IncomingMessage) -> None:
@@ -17,6 +19,7 @@ class AssetChannel(RFUniverseChannel):
         if title == 'PreLoad Done':
             print(title)
             self.done = True
+            self.done_count += 1
         elif title == 'RFMoveColliders':
             collider = []
             object_count = msg.read_int32()
@@ -29,28 +32,14 @@ class AssetChannel(RFUniverseChannel):
                 for j in range(collider_count):
                     collider_data = {}
                     collider_data['type'] = msg.read_string()
-                    collider_data['position'] = []
-                    collider_data['position'].append(msg.read_float32())
-                    collider_data['position'].append(msg.read_float32())
-                    collider_data['position'].append(msg.read_float32())
+                    collider_data['position'] = msg.read_float32_array(length=3).copy()
                     if collider_data['type'] == 'box':
-                        collider_data['rotation'] = []
-                        collider_data['rotation'].append(msg.read_float32())
-                        collider_data['rotation'].append(msg.read_float32())
-                        collider_data['rotation'].append(msg.read_float32())
-                        collider_data['rotation'].append(msg.read_float32())
-                        collider_data['size'] = []
-                        collider_data['size'].append(msg.read_float32())
-                        collider_data['size'].append(msg.read_float32())
-                        collider_data['size'].append(msg.read_float32())
+                        collider_data['rotation'] = msg.read_float32_array(length=4).copy()
+                        collider_data['size'] = msg.read_float32_array(length=3).copy()
                     elif collider_data['type'] == 'sphere':
                         collider_data['radius'] = msg.read_float32()
                     elif collider_data['type'] == 'capsule':
-                        collider_data['rotation'] = []
-                        collider_data['rotation'].append(msg.read_float32())
-                        collider_data['rotation'].append(msg.read_float32())
-                        collider_data['rotation'].append(msg.read_float32())
-                        collider_data['rotation'].append(msg.read_float32())
+                        collider_data['rotation'] = msg.read_float32_array(length=4).copy()
                         collider_data['direction'] = msg.read_int32()
                         collider_data['radius'] = msg.read_float32()
                         collider_data['height'] = msg.read_float32()
@@ -58,11 +47,9 @@ class AssetChannel(RFUniverseChannel):
                 collider.append(one)
             self.data['colliders'] = collider
         elif title == 'CurrentCollisionPairs':
-            collision_pairs = []
             pair_count = msg.read_int32()
-            for i in range(pair_count):
-                data = [msg.read_int32(), msg.read_int32()]
-                collision_pairs.append(data)
+            # Copied, so that the pairs are writable and don't keep the message alive.
+            collision_pairs = msg.read_int32_array(length=pair_count * 2).reshape(-1, 2).copy()
             self.data['collision_pairs'] = collision_pairs
 
     def PreLoadAssetsAsync(self, names: list) -> None:
@@ -145,6 +132,36 @@ class AssetChannel(RFUniverseChannel):
         msg.write_float32(kwargs['delta_time'])
         self.send_message(msg)
 
+    def EnableRawBytesPayload(self, kwargs: dict) -> None:
+        """Ask Unity to send image payloads in instance messages as raw bytes instead of base64 strings.
+        Unity confirms by titling the following instance messages 'Instance Info Raw'; older builds ignore
+        this message and keep sending base64 strings.
+        Args:
+            Compulsory:
+            enabled: Whether raw bytes payloads are accepted.
+        """
+        compulsory_params = ['enabled']
+        self._check_kwargs(kwargs, compulsory_params)
+        msg = OutgoingMessage()
+        msg.write_string('EnableRawBytesPayload')
+        msg.write_bool(kwargs['enabled'])
+        self.send_message(msg)
+
+    def StepFrames(self, kwargs: dict) -> None:
+        """Ask Unity to advance several physics frames before replying to the current step, so that waiting for
+        physics to settle costs one exchange instead of one per frame. Actions sent in the same step are applied
+        once, before the first frame. Only the state after the last frame is sent back.
+        Args:
+            Compulsory:
+            frames: The number of frames to advance.
+        """
+        compulsory_params = ['frames']
+        self._check_kwargs(kwargs, compulsory_params)
+        msg = OutgoingMessage()
+        msg.write_string('StepFrames')
+        msg.write_int32(kwargs['frames'])
+        self.send_message(msg)
+
     def SetTimeScale(self, kwargs: dict) -> None:
         compulsory_params = ['time_scale']
         self._check_kwargs(kwargs, compulsory_params)
@@ -16,11 +16,18 @@ class RenderingMode(Enum):
 
 
 class CameraChannel:
+    # Accepted message titles, and whether image payloads in that message are raw bytes.
+    titles = {
+        'Camera Info': False,
+        'Camera Info Raw': True,
+    }
 
     def __init__(self, channel: InstanceChannel) -> None:
         self.channel = channel
 
-    def _parse_message(self, msg: IncomingMessage) -> dict:
+    def _parse_message(self, msg: IncomingMessage, title: str = 'Camera Info') -> dict:
+        assert title in self.titles, 'The information %s is not for camera, please check uuid to avoid repeat.' % title
+        raw_bytes = self.titles[title]
         this_object_data = {}
         this_object_data['near_plane'] = msg.read_float32()
         this_object_data['far_plane'] = msg.read_float32()
@@ -28,16 +35,12 @@ class CameraChannel:
         this_object_data['target_display'] = msg.read_int32()
         this_object_data['width'] = msg.read_int32()
         this_object_data['height'] = msg.read_int32()
-        if msg.read_bool() is True:
-            this_object_data['rgb'] = base64.b64decode(msg.read_string())
-        if msg.read_bool() is True:
-            this_object_data['normal'] = base64.b64decode(msg.read_string())
-        if msg.read_bool() is True:
-            this_object_data['id'] = base64.b64decode(msg.read_string())
-        if msg.read_bool() is True:
-            this_object_data['depth'] = base64.b64decode(msg.read_string())
-        if msg.read_bool() is True:
-            this_object_data['depth_exr'] = base64.b64decode(msg.read_string())
+        for key in ['rgb', 'normal', 'id', 'depth', 'depth_exr']:
+            if msg.read_bool() is True:
+                if raw_bytes:
+                    this_object_data[key] = msg.read_bytes()
+                else:
+                    this_object_data[key] = base64.b64decode(msg.read_string())
         return this_object_data
 
     def set_action(self, action: str, **kwargs) -> None:
@@ -0,0 +1,89 @@
+import base64
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Tuple
+
+# OpenCV only decodes EXR images when this is set before it is imported.
+os.environ.setdefault('OPENCV_IO_ENABLE_OPENEXR', '1')
+
+import cv2
+import numpy as np
+
+from pyrfuniverse.exception import UnityObservationException
+
+
+def decode_color(payload) -> np.ndarray:
+    """Decode an encoded color image (PNG or JPEG) into a (H, W, 3) uint8 array in RGB order."""
+    img = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise UnityObservationException('Could not decode the color image sent by Unity.')
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+
+def decode_depth(payload) -> np.ndarray:
+    """Decode the depth image of GetDepth into a (H, W) float32 array. 0 and 1 correspond to the zero_dis and
+    one_dis given to GetDepth.
+    """
+    img = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        raise UnityObservationException('Could not decode the depth image sent by Unity.')
+    return img.astype(np.float32) / 255.0
+
+
+def decode_depth_exr(payload) -> np.ndarray:
+    """Decode the EXR image of GetDepthEXR into a (H, W) float32 array."""
+    img = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_ANYDEPTH)
+    if img is None:
+        raise UnityObservationException('Could not decode the EXR depth image sent by Unity.')
+    return img.astype(np.float32, copy=False)
+
+
+class ImageDecoder:
+    """Decodes camera payloads of InstanceChannel into NumPy arrays in a thread pool. Decoding starts as soon
+    as a message is parsed, so it runs while Python goes on with the next step. The latest result of each
+    object and payload is kept until a new payload for them arrives.
+    """
+
+    decoders = {
+        'rgb': decode_color,
+        'normal': decode_color,
+        'id_map': decode_color,
+        'depth': decode_depth,
+        'depth_exr': decode_depth_exr,
+    }
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.futures: Dict[Tuple[int, str], Future] = {}
+
+    def submit(self, object_id: int, payloads: Dict[str, object], base64_encoded: bool = False) -> None:
+        """Start decoding the image payloads of a camera object. The workers only read the payloads, never the
+        object data in InstanceChannel.data.
+        Args:
+            object_id: The id of object.
+            payloads: The encoded image of each key sent this step, as bytes or a memoryview over the message.
+            base64_encoded: If True, the payloads are still base64 strings, which are decoded in the worker too.
+        """
+        for key, payload in payloads.items():
+            decoder = self.decoders[key]
+            if base64_encoded:
+                future = self.executor.submit(self._decode_base64, decoder, payload)
+            else:
+                future = self.executor.submit(decoder, payload)
+            self.futures[(object_id, key)] = future
+
+    def get(self, object_id: int, key: str) -> np.ndarray:
+        """Get a decoded image, waiting for it if it is still being decoded.
+        Args:
+            object_id: The id of camera.
+            key: One of 'rgb', 'normal', 'id_map', 'depth' and 'depth_exr'.
+        """
+        return self.futures[(object_id, key)].result()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
+        self.futures = {}
+
+    @staticmethod
+    def _decode_base64(decoder, payload) -> np.ndarray:
+        return decoder(base64.b64decode(payload))
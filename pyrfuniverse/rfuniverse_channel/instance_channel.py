@@ -3,124 +3,320 @@ from pyrfuniverse.side_channel.side_channel import (
     OutgoingMessage,
 )
 from pyrfuniverse.rfuniverse_channel import RFUniverseChannel
+from pyrfuniverse.rfuniverse_channel.instance_state import (
+    InstanceStateStore,
+    LazyInstanceRecord,
+    DeferredField,
+)
+from pyrfuniverse.rfuniverse_channel.image_decoder import ImageDecoder
+from pyrfuniverse.exception import UnityCommunicationException
+from concurrent.futures import Future
+import numpy as np
 import base64
+import functools
 
 class InstanceChannel(RFUniverseChannel):
-
-    def __init__(self, channel_id: str, env) -> None:
+    # Accepted message titles, and whether image payloads in that message are raw bytes.
+    titles = {
+        'Instance Info': False,
+        'Instance Info Raw': True,
+    }
+    # Image payloads of cameras, in the order they are sent.
+    image_keys = ('rgb', 'normal', 'id_map', 'depth', 'depth_exr')
+    # Fields which are only sent on some steps.
+    optional_keys = image_keys + (
+        'result_local_point',
+        'result_world_point',
+        'gravity_forces',
+        'coriolis_centrifugal_forces',
+        'drive_forces',
+    )
+    # Messages start with the id of the object, followed by the action name.
+    action_name_offset = 4
+    # Actions which don't target an object start with their name.
+    action_name_offsets = {
+        'SetTargetX': 0,
+    }
+    # Setters of which only the last call per object and step matters, see RFUniverseChannel.set_action().
+    coalesced_actions = frozenset({
+        'SetTransform',
+        'SetRotationQuaternion',
+        'SetJointPosition',
+        'SetJointPositionDirectly',
+    })
+
+    def __init__(
+            self, channel_id: str, env, columnar: bool = False, lazy: bool = False, decode_images: bool = False
+    ) -> None:
+        """
+        Args:
+            channel_id: The uuid of this channel.
+            env: The environment owning this channel.
+            columnar: If True, self.data is an InstanceStateStore updated in place on each message,
+                instead of a dict rebuilt on each message.
+            lazy: If True, each object in self.data is a LazyInstanceRecord, which only decodes the object
+                when it is first read, and its image payloads when they are first read.
+            decode_images: If True, camera payloads are decoded into NumPy arrays in a thread pool as soon as
+                they arrive. Use get_image() to read them.
+        """
         super().__init__(channel_id)
+        assert not (columnar and lazy), \
+            'An InstanceChannel can not be both columnar and lazy.'
         self.env = env
-        self.data = {}
+        self.columnar = columnar
+        self.lazy = lazy
+        self.data = InstanceStateStore() if columnar else {}
+        self.image_decoder = ImageDecoder() if decode_images else None
+        # Futures of the trajectories sent by follow_trajectory() which Unity didn't finish yet.
+        self.trajectory_futures = {}
+        self.next_trajectory_id = 0
 
     def _parse_message(self, msg: IncomingMessage) -> None:
         title = msg.read_string()
-        assert title == 'Instance Info', \
+        if title == 'Trajectory Done':
+            self._parse_trajectory_done(msg)
+            return
+        # Unity sends 'Instance Info Raw' once AssetChannel.EnableRawBytesPayload was accepted, in which case
+        # image payloads are raw bytes instead of base64 strings.
+        assert title in self.titles, \
             'The information %s is not for game_object, please check uuid to avoid repeat.' % title
+        raw_bytes = self.titles[title]
         count = msg.read_int32()
 
+        if self.lazy:
+            parse = functools.partial(self._parse_object, raw_bytes=raw_bytes)
         for i in range(count):
             this_object_id = msg.read_int32()
-            this_object_data = {}
-            this_object_data['name'] = msg.read_string()
-            this_object_data['type'] = msg.read_string()
-            this_object_data['position'] = [msg.read_float32() for _ in range(3)]
-            this_object_data['rotation'] = [msg.read_float32() for _ in range(3)]
-            this_object_data['quaternion'] = [msg.read_float32() for _ in range(4)]
-            if msg.read_bool() is True:
-                this_object_data['result_local_point'] = msg.read_float32_list()
-            if msg.read_bool() is True:
-                this_object_data['result_world_point'] = msg.read_float32_list()
-
-            #if this_object_data['type'] == 'GameObject':
-            if this_object_data['type'] == 'Rigidbody':
-                this_object_data['velocity'] = [msg.read_float32() for i in range(3)]
-                this_object_data['angular_vel'] = [msg.read_float32() for i in range(3)]
-            elif this_object_data['type'] == 'Controller':
-                this_object_data['number_of_joints'] = msg.read_int32()
-                # Position
-                this_object_data['positions'] = self._parse_raw_list_3(msg.read_float32_list())
-                # RotationEuler
-                this_object_data['rotations'] = self._parse_raw_list_3(msg.read_float32_list())
-                # RotationQuaternion
-                this_object_data['quaternion'] = self._parse_raw_list_4(msg.read_float32_list())
-                # Velocity
-                this_object_data['velocities'] = self._parse_raw_list_3(msg.read_float32_list())
-                # Each joint position
-                this_object_data['joint_positions'] = msg.read_float32_list()
-                # Each joint velocity
-                this_object_data['joint_velocities'] = msg.read_float32_list()
-                # Whether all parts are stable
-                this_object_data['all_stable'] = msg.read_bool()
-                this_object_data['move_done'] = msg.read_bool()
-                this_object_data['rotate_done'] = msg.read_bool()
-                if msg.read_bool() is True:
-                    this_object_data['gravity_forces'] = msg.read_float32_list()
-                    this_object_data['coriolis_centrifugal_forces'] = msg.read_float32_list()
-                    this_object_data['drive_forces'] = msg.read_float32_list()
-            elif this_object_data['type'] == 'Camera':
-                this_object_data['near_plane'] = msg.read_float32()
-                this_object_data['far_plane'] = msg.read_float32()
-                this_object_data['FOV'] = msg.read_float32()
-                this_object_data['target_display'] = msg.read_int32()
-                this_object_data['width'] = msg.read_int32()
-                this_object_data['height'] = msg.read_int32()
-                if msg.read_bool() is True:
-                    this_object_data['rgb'] = base64.b64decode(msg.read_string())
-                if msg.read_bool() is True:
-                    this_object_data['normal'] = base64.b64decode(msg.read_string())
-                if msg.read_bool() is True:
-                    this_object_data['id_map'] = base64.b64decode(msg.read_string())
-                if msg.read_bool() is True:
-                    this_object_data['depth'] = base64.b64decode(msg.read_string())
-                if msg.read_bool() is True:
-                    this_object_data['depth_exr'] = base64.b64decode(msg.read_string())
-            #elif this_object_data['type'] == 'Cloth':
-            #elif this_object_data['type'] == 'ClothWithGrasping':
-            elif this_object_data['type'] == 'Softbody':
-                # Number of particles
-                this_object_data['number_of_particles'] = msg.read_int32()
-                # Average Positions
-                this_object_data['position'] = [msg.read_float32() for i in range(3)]
-                this_object_data['orientation'] = [msg.read_float32() for i in range(4)]
-                this_object_data['velocity'] = [msg.read_float32() for i in range(3)]
-                this_object_data['angular_vel'] = [msg.read_float32() for i in range(3)]
-            elif this_object_data['type'] == 'HumanDressing':
-                # Grasp point position
-                this_object_data['grasp_position'] = [msg.read_float32() for i in range(3)]
-                # Grasp point rotation
-                this_object_data['grasp_rotation'] = [msg.read_float32() for i in range(3)]
-                # Grasp point velocity
-                this_object_data['grasp_velocity'] = [msg.read_float32() for i in range(3)]
-                # Grasp point angular velocity
-                this_object_data['grasp_angular_vel'] = [msg.read_float32() for i in range(3)]
-                # Target position
-                this_object_data['target_position'] = [msg.read_float32() for i in range(3)]
-                # Target rotation
-                this_object_data['target_rotation'] = [msg.read_float32() for i in range(3)]
-
+            if self.lazy:
+                this_object_data = LazyInstanceRecord(parse, msg.buffer, msg.offset)
+                # The payloads are found while skipping, so the record is not parsed on this thread.
+                images = {} if self.image_decoder is not None else None
+                self._skip_object(msg, images)
+                if images:
+                    self.image_decoder.submit(this_object_id, images, base64_encoded=not raw_bytes)
+            else:
+                if self.columnar:
+                    this_object_data = self.data.record(this_object_id)
+                    # Optional fields, such as images, are only valid for the step they were sent in.
+                    for key in self.optional_keys:
+                        this_object_data.pop(key, None)
+                else:
+                    this_object_data = {}
+                self._parse_object(msg, this_object_data, raw_bytes=raw_bytes)
+                if self.image_decoder is not None:
+                    images = {key: this_object_data[key] for key in self.image_keys if key in this_object_data}
+                    if images:
+                        self.image_decoder.submit(this_object_id, images)
             self.data[this_object_id] = this_object_data
 
-    def _parse_raw_list_3(self, raw_list):
-        length = len(raw_list)
-        assert length % 3 == 0
-        number_of_parts = length // 3
-        norm_list = []
-        for j in range(number_of_parts):
-            transform = [raw_list[3 * j], raw_list[3 * j + 1], raw_list[3 * j + 2]]
-            norm_list.append(transform)
-
-        return norm_list
+    def get_image(self, id: int, key: str = 'rgb'):
+        """Get a camera image decoded into a NumPy array. Color images are (H, W, 3) uint8 arrays in RGB order,
+        depth images are (H, W) float32 arrays. The channel must be created with decode_images=True.
+        Args:
+            id: The id of camera.
+            key: One of 'rgb', 'normal', 'id_map', 'depth' and 'depth_exr'.
+        """
+        assert self.image_decoder is not None, \
+            'Images are not decoded by this channel, please create it with decode_images=True.'
+        return self.image_decoder.get(id, key)
+
+    def close(self) -> None:
+        if self.image_decoder is not None:
+            self.image_decoder.close()
+        for future in self.trajectory_futures.values():
+            future.set_exception(UnityCommunicationException('The channel was closed before the trajectory was done.'))
+        self.trajectory_futures = {}
+
+    def follow_trajectory(self, id: int, times, joint_positions) -> Future:
+        """Send a whole joint trajectory to an articulation body, which Unity follows on its own. Use the returned
+        Future, for example with RFUniverseBaseEnv.wait_until(), instead of stepping waypoint by waypoint.
+        Args:
+            id: The id of articulation body.
+            times: A 1-d array of strictly increasing times, in seconds from now, at which each waypoint is reached.
+            joint_positions: A 2-d array with the joint positions of each waypoint, one row per time.
 
-    def _parse_raw_list_4(self, raw_list):
-        length = len(raw_list)
-        assert length % 4 == 0
-        number_of_parts = length // 4
-        norm_list = []
-        for j in range(number_of_parts):
-            transform = [raw_list[4 * j], raw_list[4 * j + 1], raw_list[4 * j + 2], raw_list[4 * j + 3]]
-            norm_list.append(transform)
+        Returns:
+            A Future which resolves once Unity reached the last waypoint.
+        """
+        trajectory_id = self.next_trajectory_id
+        self.next_trajectory_id += 1
+        future = Future()
+        future.set_running_or_notify_cancel()
+        self.trajectory_futures[trajectory_id] = future
+        try:
+            self.set_action(
+                'FollowJointTrajectory',
+                id=id,
+                trajectory_id=trajectory_id,
+                times=times,
+                joint_positions=joint_positions
+            )
+        except BaseException:
+            del self.trajectory_futures[trajectory_id]
+            raise
+        return future
+
+    def _parse_trajectory_done(self, msg: IncomingMessage) -> None:
+        count = msg.read_int32()
+        for i in range(count):
+            future = self.trajectory_futures.pop(msg.read_int32(), None)
+            if future is not None and not future.done():
+                future.set_result(True)
+
+    def _parse_object(
+            self, msg: IncomingMessage, this_object_data, defer: bool = False, raw_bytes: bool = False
+    ) -> None:
+        """Parse the data of one object, starting right after its id.
+        Args:
+            msg: IncomingMessage, the incoming message
+            this_object_data: The dict (or record) to fill.
+            defer: If True, image payloads are stored as DeferredField and only decoded when read.
+            raw_bytes: If True, image payloads are raw bytes, returned as memoryview without copying.
+        """
+        this_object_data['name'] = msg.read_string()
+        this_object_data['type'] = msg.read_string()
+        this_object_data['position'] = [msg.read_float32() for _ in range(3)]
+        this_object_data['rotation'] = [msg.read_float32() for _ in range(3)]
+        quaternion = [msg.read_float32() for _ in range(4)]
+        # The 'quaternion' of a Controller holds one quaternion per part instead, see below.
+        if this_object_data['type'] == 'Controller':
+            this_object_data['root_quaternion'] = quaternion
+        else:
+            this_object_data['quaternion'] = quaternion
+        if msg.read_bool() is True:
+            this_object_data['result_local_point'] = self._read_float32_array(msg)
+        if msg.read_bool() is True:
+            this_object_data['result_world_point'] = self._read_float32_array(msg)
+
+        #if this_object_data['type'] == 'GameObject':
+        if this_object_data['type'] == 'Rigidbody':
+            this_object_data['velocity'] = [msg.read_float32() for i in range(3)]
+            this_object_data['angular_vel'] = [msg.read_float32() for i in range(3)]
+        elif this_object_data['type'] == 'Controller':
+            this_object_data['number_of_joints'] = msg.read_int32()
+            # Position
+            this_object_data['positions'] = self._read_float32_array(msg).reshape(-1, 3)
+            # RotationEuler
+            this_object_data['rotations'] = self._read_float32_array(msg).reshape(-1, 3)
+            # RotationQuaternion
+            this_object_data['quaternion'] = self._read_float32_array(msg).reshape(-1, 4)
+            # Velocity
+            this_object_data['velocities'] = self._read_float32_array(msg).reshape(-1, 3)
+            # Each joint position
+            this_object_data['joint_positions'] = self._read_float32_array(msg)
+            # Each joint velocity
+            this_object_data['joint_velocities'] = self._read_float32_array(msg)
+            # Whether all parts are stable
+            this_object_data['all_stable'] = msg.read_bool()
+            this_object_data['move_done'] = msg.read_bool()
+            this_object_data['rotate_done'] = msg.read_bool()
+            if msg.read_bool() is True:
+                this_object_data['gravity_forces'] = self._read_float32_array(msg)
+                this_object_data['coriolis_centrifugal_forces'] = self._read_float32_array(msg)
+                this_object_data['drive_forces'] = self._read_float32_array(msg)
+        elif this_object_data['type'] == 'Camera':
+            this_object_data['near_plane'] = msg.read_float32()
+            this_object_data['far_plane'] = msg.read_float32()
+            this_object_data['FOV'] = msg.read_float32()
+            this_object_data['target_display'] = msg.read_int32()
+            this_object_data['width'] = msg.read_int32()
+            this_object_data['height'] = msg.read_int32()
+            if msg.read_bool() is True:
+                this_object_data['rgb'] = self._read_image(msg, defer, raw_bytes)
+            if msg.read_bool() is True:
+                this_object_data['normal'] = self._read_image(msg, defer, raw_bytes)
+            if msg.read_bool() is True:
+                this_object_data['id_map'] = self._read_image(msg, defer, raw_bytes)
+            if msg.read_bool() is True:
+                this_object_data['depth'] = self._read_image(msg, defer, raw_bytes)
+            if msg.read_bool() is True:
+                this_object_data['depth_exr'] = self._read_image(msg, defer, raw_bytes)
+        #elif this_object_data['type'] == 'Cloth':
+        #elif this_object_data['type'] == 'ClothWithGrasping':
+        elif this_object_data['type'] == 'Softbody':
+            # Number of particles
+            this_object_data['number_of_particles'] = msg.read_int32()
+            # Average Positions
+            this_object_data['position'] = [msg.read_float32() for i in range(3)]
+            this_object_data['orientation'] = [msg.read_float32() for i in range(4)]
+            this_object_data['velocity'] = [msg.read_float32() for i in range(3)]
+            this_object_data['angular_vel'] = [msg.read_float32() for i in range(3)]
+        elif this_object_data['type'] == 'HumanDressing':
+            # Grasp point position
+            this_object_data['grasp_position'] = [msg.read_float32() for i in range(3)]
+            # Grasp point rotation
+            this_object_data['grasp_rotation'] = [msg.read_float32() for i in range(3)]
+            # Grasp point velocity
+            this_object_data['grasp_velocity'] = [msg.read_float32() for i in range(3)]
+            # Grasp point angular velocity
+            this_object_data['grasp_angular_vel'] = [msg.read_float32() for i in range(3)]
+            # Target position
+            this_object_data['target_position'] = [msg.read_float32() for i in range(3)]
+            # Target rotation
+            this_object_data['target_rotation'] = [msg.read_float32() for i in range(3)]
+
+    def _skip_object(self, msg: IncomingMessage, images: dict = None) -> str:
+        """Move msg past the data of one object without decoding it. This must follow the layout read by
+        _parse_object.
+        Args:
+            msg: IncomingMessage, the incoming message
+            images: Optional. Filled with the still encoded image payloads of a camera, as memoryviews over msg.
 
-        return norm_list
+        Returns:
+            The type of the object.
+        """
+        msg.read_string()
+        object_type = msg.read_string()
+        # position, rotation, quaternion
+        msg.offset += 40
+        for _ in range(2):
+            if msg.read_bool() is True:
+                self._skip_list(msg, 4)
+
+        if object_type == 'Rigidbody':
+            msg.offset += 24
+        elif object_type == 'Controller':
+            msg.offset += 4
+            for _ in range(6):
+                self._skip_list(msg, 4)
+            msg.offset += 3
+            if msg.read_bool() is True:
+                for _ in range(3):
+                    self._skip_list(msg, 4)
+        elif object_type == 'Camera':
+            msg.offset += 24
+            for key in self.image_keys:
+                if msg.read_bool() is True:
+                    if images is not None:
+                        images[key] = msg.read_bytes()
+                    else:
+                        self._skip_list(msg, 1)
+        elif object_type == 'Softbody':
+            msg.offset += 56
+        elif object_type == 'HumanDressing':
+            msg.offset += 72
+        return object_type
+
+    def _read_float32_array(self, msg: IncomingMessage):
+        array = msg.read_float32_array()
+        # The array is a read-only view over the message. Columnar records copy it into their own arrays,
+        # otherwise copy it here so that callers can modify it and the message is not kept alive.
+        return array if self.columnar else array.copy()
+
+    def _skip_list(self, msg: IncomingMessage, item_size: int) -> None:
+        # Strings and lists are both written as an int32 length followed by the items.
+        length = msg.read_int32()
+        msg.offset += length * item_size
+
+    def _read_image(self, msg: IncomingMessage, defer: bool = False, raw_bytes: bool = False):
+        if raw_bytes:
+            return msg.read_bytes()
+        if defer:
+            buffer = msg.buffer
+            offset = msg.offset
+            self._skip_list(msg, 1)
+            return DeferredField(lambda: self._read_image(IncomingMessage(buffer, offset)))
+        return base64.b64decode(msg.read_string())
 
     def SetTransform(self, kwargs: dict) -> None:
         """Set the transform of a object, specified by id.
@@ -350,10 +546,10 @@ class InstanceChannel(RFUniverseChannel):
         Args:
             Compulsory:
             index: The index of articulation body, specified in returned message.
-            joint_positions: A list inferring each joint's position in the specified acticulation body.
+            joint_positions: A list or 1-d array inferring each joint's position in the specified acticulation body.
 
             Optional:
-            speed_scales: A list inferring each joint's speed scale. The length must be the same with joint_positions.
+            speed_scales: A list or 1-d array inferring each joint's speed scale. The length must be the same with joint_positions.
         """
         compulsory_params = ['id', 'joint_positions']
         optional_params = ['speed_scales']
@@ -366,13 +562,13 @@ class InstanceChannel(RFUniverseChannel):
         msg.write_int32(kwargs['id'])
         msg.write_string('SetJointPosition')
         msg.write_int32(num_joints)
-        msg.write_float32_list(kwargs['joint_positions'])
+        msg.write_float32_array(joint_positions)
         if 'speed_scales' in kwargs.keys():
             assert num_joints == len(kwargs['speed_scales']), \
                 'The length of joint_positions and speed_scales are not equal.'
-            msg.write_float32_list(kwargs['speed_scales'])
+            msg.write_float32_array(kwargs['speed_scales'])
         else:
-            msg.write_float32_list([1.0 for i in range(num_joints)])
+            msg.write_float32_array(np.ones(num_joints))
 
         self.send_message(msg)
 
@@ -382,7 +578,7 @@ class InstanceChannel(RFUniverseChannel):
         Args:
             Compulsory:
             index: The index of articulation body, specified in returned message.
-            joint_positions: A list inferring each joint's position in the specified acticulation body.
+            joint_positions: A list or 1-d array inferring each joint's position in the specified acticulation body.
         """
         compulsory_params = ['id', 'joint_positions']
         optional_params = []
@@ -395,7 +591,7 @@ class InstanceChannel(RFUniverseChannel):
         msg.write_int32(kwargs['id'])
         msg.write_string('SetJointPositionDirectly')
         msg.write_int32(num_joints)
-        msg.write_float32_list(kwargs['joint_positions'])
+        msg.write_float32_array(joint_positions)
 
         self.send_message(msg)
 
@@ -405,9 +601,9 @@ class InstanceChannel(RFUniverseChannel):
         self._check_kwargs(kwargs, compulsory_params)
 
         msg = OutgoingMessage()
-        time_joint_positions = kwargs['time_joint_positions']
-        num_times = len(time_joint_positions)
-        num_joints = len(time_joint_positions[0])
+        time_joint_positions = np.asarray(kwargs['time_joint_positions'])
+        num_times = time_joint_positions.shape[0]
+        num_joints = time_joint_positions.shape[1]
         interval = kwargs['interval']
 
         msg.write_int32(kwargs['id'])
@@ -415,8 +611,42 @@ class InstanceChannel(RFUniverseChannel):
         msg.write_int32(num_times)
         msg.write_int32(num_joints)
         msg.write_int32(interval)
-        for i in range(num_times):
-            msg.write_float32_list(time_joint_positions[i])
+        msg.write_float32_rows(time_joint_positions)
+
+        self.send_message(msg)
+
+    def FollowJointTrajectory(self, kwargs: dict) -> None:
+        """Send a time-parameterized joint trajectory as one packed array. Unity interpolates the joint targets
+        between waypoints and replies 'Trajectory Done' with trajectory_id once the last one is reached. Prefer
+        follow_trajectory(), which returns a Future of that reply.
+        Args:
+            Compulsory:
+            id: The id of articulation body.
+            trajectory_id: The id Unity reports on completion.
+            times: A 1-d array of strictly increasing times, in seconds from now, at which each waypoint is reached.
+            joint_positions: A 2-d array with the joint positions of each waypoint, one row per time.
+        """
+        compulsory_params = ['id', 'trajectory_id', 'times', 'joint_positions']
+        optional_params = []
+        self._check_kwargs(kwargs, compulsory_params)
+
+        times = np.asarray(kwargs['times'], dtype=np.float32)
+        joint_positions = np.asarray(kwargs['joint_positions'], dtype=np.float32)
+        assert times.ndim == 1 and joint_positions.ndim == 2 and joint_positions.shape[0] == times.shape[0], \
+            'times must be a 1-d array with one time per row of joint_positions.'
+        assert np.all(np.diff(times) > 0), \
+            'times must be strictly increasing.'
+        num_points, num_joints = joint_positions.shape
+
+        msg = OutgoingMessage()
+
+        msg.write_int32(kwargs['id'])
+        msg.write_string('FollowJointTrajectory')
+        msg.write_int32(kwargs['trajectory_id'])
+        msg.write_int32(num_points)
+        msg.write_int32(num_joints)
+        # One row of (time, joint positions) per waypoint.
+        msg.write_float32_array(np.column_stack([times, joint_positions]), write_length=False)
 
         self.send_message(msg)
 
@@ -432,7 +662,7 @@ class InstanceChannel(RFUniverseChannel):
         msg.write_int32(kwargs['id'])
         msg.write_string('SetJointVelocity')
         msg.write_int32(num_joints)
-        msg.write_float32_list(kwargs['joint_velocitys'])
+        msg.write_float32_array(joint_velocitys)
 
         self.send_message(msg)
 
@@ -442,16 +672,13 @@ class InstanceChannel(RFUniverseChannel):
         self._check_kwargs(kwargs, compulsory_params)
 
         msg = OutgoingMessage()
-        joint_positions = kwargs['joint_positions']
-        num_joints = len(joint_positions)
+        joint_forces = np.asarray(kwargs['joint_forces'])
+        num_joints = len(joint_forces)
 
         msg.write_int32(kwargs['id'])
         msg.write_string('SetJointForce')
         msg.write_int32(num_joints)
-        for i in range(num_joints):
-            msg.write_float32(joint_positions[i][0])
-            msg.write_float32(joint_positions[i][1])
-            msg.write_float32(joint_positions[i][2])
+        msg.write_float32_array(joint_forces[:, :3], write_length=False)
 
         self.send_message(msg)
 
@@ -461,20 +688,18 @@ class InstanceChannel(RFUniverseChannel):
         self._check_kwargs(kwargs, compulsory_params)
 
         msg = OutgoingMessage()
-        joint_positions = kwargs['joint_forces']
-        forces_position = kwargs['forces_position']
-        num_joints = len(joint_positions)
+        joint_forces = np.asarray(kwargs['joint_forces'])
+        forces_position = np.asarray(kwargs['forces_position'])
+        num_joints = len(joint_forces)
 
         msg.write_int32(kwargs['id'])
         msg.write_string('SetJointForceAtPosition')
         msg.write_int32(num_joints)
-        for i in range(num_joints):
-            msg.write_float32(joint_positions[i][0])
-            msg.write_float32(joint_positions[i][1])
-            msg.write_float32(joint_positions[i][2])
-            msg.write_float32(forces_position[i][0])
-            msg.write_float32(forces_position[i][1])
-            msg.write_float32(forces_position[i][2])
+        # Each joint is written as force x, y, z followed by position x, y, z.
+        msg.write_float32_array(
+            np.concatenate((joint_forces[:, :3], forces_position[:, :3]), axis=1),
+            write_length=False
+        )
 
         self.send_message(msg)
 
@@ -484,16 +709,13 @@ class InstanceChannel(RFUniverseChannel):
         self._check_kwargs(kwargs, compulsory_params)
 
         msg = OutgoingMessage()
-        joint_torque = kwargs['joint_torque']
+        joint_torque = np.asarray(kwargs['joint_torque'])
         num_joints = len(joint_torque)
 
         msg.write_int32(kwargs['id'])
         msg.write_string('SetJointTorque')
         msg.write_int32(num_joints)
-        for i in range(num_joints):
-            msg.write_float32(joint_torque[i][0])
-            msg.write_float32(joint_torque[i][1])
-            msg.write_float32(joint_torque[i][2])
+        msg.write_float32_array(joint_torque[:, :3], write_length=False)
 
         self.send_message(msg)
 
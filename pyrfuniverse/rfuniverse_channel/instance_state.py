@@ -0,0 +1,176 @@
+from collections.abc import Mapping
+from typing import Callable
+
+import numpy as np
+
+from pyrfuniverse.side_channel import IncomingMessage
+
+
+class InstanceRecord(dict):
+    """Per-object view of an InstanceStateStore. It behaves like the dict stored in InstanceChannel.data, but
+    array fields are updated in place when the new value has the same shape, so the arrays returned by
+    previous reads stay valid and no new arrays are allocated on each step.
+    """
+
+    # Fields written to the row of another column, such as the root quaternion of a Controller, whose
+    # 'quaternion' field holds one quaternion per part instead.
+    column_aliases = {
+        'root_quaternion': 'quaternion',
+    }
+
+    def __init__(self) -> None:
+        super().__init__()
+        # The row of this object in each column, set by InstanceStateStore.
+        self.rows = {}
+
+    def __setitem__(self, key, value) -> None:
+        row = self.rows.get(self.column_aliases.get(key))
+        if row is not None and row.shape == np.shape(value):
+            row[...] = value
+            super().__setitem__(key, row)
+            return
+        existing = self.get(key)
+        if isinstance(existing, np.ndarray) and isinstance(value, (list, tuple, np.ndarray)) \
+                and existing.shape == np.shape(value):
+            existing[...] = value
+        elif isinstance(value, (list, np.ndarray)):
+            super().__setitem__(key, np.array(value, dtype=np.float32))
+        else:
+            super().__setitem__(key, value)
+
+
+class InstanceStateStore(dict):
+    """Array-backed alternative to the plain dict in InstanceChannel.data. Each object id maps to an
+    InstanceRecord, so data[id][key] still works, while the root pose and velocity of every object also live
+    in preallocated (capacity, n) columns. Use index() and column() to read all objects at once. The
+    'quaternion' column holds the root quaternion of Controllers too, which their records name 'root_quaternion'.
+    """
+
+    # Fixed-size fields shared by every object type, stored as rows of one column array per field.
+    column_sizes = {
+        'position': 3,
+        'rotation': 3,
+        'quaternion': 4,
+        'velocity': 3,
+        'angular_vel': 3,
+    }
+
+    def __init__(self, capacity: int = 64) -> None:
+        super().__init__()
+        self.capacity = capacity
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.columns = {
+            key: np.zeros((capacity, size), dtype=np.float32) for key, size in self.column_sizes.items()
+        }
+        self._index = {}
+
+    def record(self, object_id: int) -> InstanceRecord:
+        """Get the record of an object, allocating a column row for it the first time it is seen.
+        Args:
+            object_id: The id of object.
+        """
+        one = self.get(object_id)
+        if one is not None:
+            return one
+
+        row = len(self._index)
+        if row == self.capacity:
+            self._grow(self.capacity * 2)
+        self._index[object_id] = row
+        self.ids[row] = object_id
+        one = InstanceRecord()
+        self._bind_columns(one, row)
+        super().__setitem__(object_id, one)
+        return one
+
+    def index(self, object_id: int) -> int:
+        """Get the row of an object in every column.
+        Args:
+            object_id: The id of object.
+        """
+        return self._index[object_id]
+
+    def column(self, key: str) -> np.ndarray:
+        """Get the rows of a fixed-size field for all objects seen so far, in index() order.
+        Args:
+            key: One of the keys in column_sizes.
+        """
+        return self.columns[key][:len(self._index)]
+
+    def __setitem__(self, object_id, value) -> None:
+        if value is not self.get(object_id):
+            record = self.record(object_id)
+            for key in value:
+                record[key] = value[key]
+
+    def _bind_columns(self, one: InstanceRecord, row: int) -> None:
+        for key, column in self.columns.items():
+            one.rows[key] = column[row]
+            dict.__setitem__(one, key, column[row])
+
+    def _grow(self, capacity: int) -> None:
+        ids = np.zeros(capacity, dtype=np.int64)
+        ids[:self.capacity] = self.ids
+        self.ids = ids
+        for key, column in self.columns.items():
+            new_column = np.zeros((capacity, column.shape[1]), dtype=column.dtype)
+            new_column[:self.capacity] = column
+            self.columns[key] = new_column
+        self.capacity = capacity
+        # Records hold views of the old columns, point them at the new ones.
+        for object_id, one in self.items():
+            row = self._index[object_id]
+            old_rows = {id(old_row): key for key, old_row in one.rows.items()}
+            one.rows = {key: column[row] for key, column in self.columns.items()}
+            for key, value in list(one.items()):
+                if id(value) in old_rows:
+                    dict.__setitem__(one, key, one.rows[old_rows[id(value)]])
+
+
+class DeferredField:
+    """A field value that is only decoded the first time it is read from a LazyInstanceRecord."""
+
+    __slots__ = ['decode']
+
+    def __init__(self, decode: Callable[[], object]) -> None:
+        self.decode = decode
+
+
+class LazyInstanceRecord(Mapping):
+    """Per-object view used by a lazy InstanceChannel. It only keeps where the object starts in the message
+    buffer, and parses the object the first time one of its fields is read. Fields parsed as DeferredField
+    (such as camera images) are decoded separately, the first time they are read.
+    """
+
+    __slots__ = ['_parse', '_buffer', '_offset', '_fields']
+
+    def __init__(self, parse: Callable, buffer: bytes, offset: int) -> None:
+        self._parse = parse
+        self._buffer = buffer
+        self._offset = offset
+        self._fields = None
+
+    def _load(self) -> dict:
+        if self._fields is None:
+            fields = {}
+            self._parse(IncomingMessage(self._buffer, self._offset), fields, defer=True)
+            self._fields = fields
+            self._buffer = None
+        return self._fields
+
+    def __getitem__(self, key):
+        fields = self._load()
+        value = fields[key]
+        if isinstance(value, DeferredField):
+            value = value.decode()
+            fields[key] = value
+        return value
+
+    def __contains__(self, key) -> bool:
+        return key in self._load()
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        return len(self._load())
@@ -1,25 +1,114 @@
 from pyrfuniverse.side_channel import SideChannel
 from pyrfuniverse.side_channel import IncomingMessage
 from pyrfuniverse.side_channel import OutgoingMessage
+import struct
 import uuid
 from abc import abstractmethod
-from typing import Union
+from concurrent.futures import Future
+from typing import Callable, Union
 
 
 class RFUniverseChannel(SideChannel):
 
+    # Actions of which only the last call per object id and step is sent, see set_action().
+    coalesced_actions = frozenset()
+    # Offset of the action name in the messages of this channel.
+    action_name_offset = 0
+    # Offset of the action name for actions which don't follow action_name_offset.
+    action_name_offsets = {}
+
     def __init__(self, channel_id: Union[uuid.UUID, str]) -> None:
         if type(channel_id) is str:
             super().__init__(uuid.UUID(channel_id))
         else:
             super().__init__(channel_id)
+        self.pending_futures = []
+        # Bound action methods by name, filled on first use of each action.
+        self.actions = {}
+        # Action name (as ASCII bytes) to opcode, once received from Unity.
+        self.opcodes = None
+        self.awaiting_opcodes = False
+        # The action set_action() is dispatching, whose messages may be sent with an opcode.
+        self._sending_action = None
+        # Coalescing state for the messages of the current step, reset whenever the queue is sent.
+        self._coalesce_queue = None
+        self._coalesce_length = 0
+        self._coalesced = {}
+        self._last_index_for_id = {}
 
     def on_message_received(self, msg: IncomingMessage) -> None:
+        if self.awaiting_opcodes and self._read_opcodes(msg):
+            return
         self._parse_message(msg)
+        if len(self.pending_futures) > 0:
+            self._resolve_futures()
+
+    def future(self, predicate: Callable[[], bool]) -> Future:
+        """Get a future which completes as soon as predicate() is true after a message of this channel was parsed,
+        for example when an object reports its move is done. Pass it to RFUniverseBaseEnv.wait_until(), or check
+        it with done() between steps.
+        Args:
+            predicate: Callable returning whether the awaited event happened. A KeyError, raised while the data it
+                reads has not been received yet, counts as False.
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+        self.pending_futures.append((predicate, future))
+        return future
+
+    def _resolve_futures(self) -> None:
+        pending = []
+        for predicate, future in self.pending_futures:
+            try:
+                happened = predicate()
+            except KeyError:
+                happened = False
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            if happened:
+                future.set_result(True)
+            else:
+                pending.append((predicate, future))
+        self.pending_futures = pending
 
     def send_message(self, msg: OutgoingMessage) -> None:
+        if self.opcodes is not None and self._sending_action is not None:
+            # Replace the action name by its opcode. It is written as a negative int32 where the length of the
+            # name would be, so Unity can tell both apart. The name is only replaced where the layout of the
+            # action puts it, messages laid out differently are sent unchanged.
+            name = self._sending_action.encode('ascii')
+            opcode = self.opcodes.get(name)
+            offset = self.action_name_offsets.get(self._sending_action, self.action_name_offset)
+            end = offset + 4 + len(name)
+            if opcode is not None and msg.buffer[offset:end] == struct.pack('<i', len(name)) + name:
+                msg.buffer = msg.buffer[:offset] + struct.pack('<i', -1 - opcode) + msg.buffer[end:]
         super().queue_message_to_send(msg)
 
+    def request_opcodes(self) -> None:
+        """Ask Unity for the integer opcode of each action of this channel. Once Unity replied, actions are sent with
+        their opcode instead of their name. Unity builds which don't reply keep receiving names.
+        """
+        msg = OutgoingMessage()
+        msg.buffer += bytes(self.action_name_offset)
+        msg.write_string('RequestOpcodes')
+        self.send_message(msg)
+        self.awaiting_opcodes = True
+
+    def _read_opcodes(self, msg: IncomingMessage) -> bool:
+        offset = msg.offset
+        if msg.read_string() != 'Opcodes':
+            msg.offset = offset
+            return False
+        count = msg.read_int32()
+        opcodes = {}
+        for i in range(count):
+            name = msg.read_string()
+            opcodes[name.encode('ascii')] = msg.read_int32()
+        self.opcodes = opcodes
+        self.awaiting_opcodes = False
+        return True
+
     def vis_data(self, data: dict):
         for idx in data.keys():
             for key in data[idx].keys():
@@ -53,8 +142,49 @@ class RFUniverseChannel(SideChannel):
             action: The action name.
             kwargs: keyword argument for action. The parameter list for each action is shown in each function.
         """
+        if 'id' not in kwargs:
+            self._dispatch(action, kwargs)
+            return
+        if self._coalesce_queue is not self.message_queue or self._coalesce_length != len(self.message_queue):
+            # The previous queue was sent, or messages were queued without set_action, which could target any
+            # object: start over.
+            self._coalesce_queue = self.message_queue
+            self._coalesced = {}
+            self._last_index_for_id = {}
+        object_id = kwargs['id']
+        key = (action, object_id)
+        previous = self._coalesced.get(key)
+        if previous is not None and self._last_index_for_id.get(object_id) == previous[0] \
+                and previous[1].keys() <= kwargs.keys():
+            # Nothing else was queued for this object since the previous call of this action, and this call sets
+            # every argument the previous one did, so its message replaces the previous one.
+            index = previous[0]
+            self._dispatch(action, kwargs)
+            self.message_queue[index] = self.message_queue.pop()
+        else:
+            length = len(self.message_queue)
+            self._dispatch(action, kwargs)
+            if len(self.message_queue) != length + 1:
+                # Not a single message, don't track it.
+                self._coalesce_queue = None
+                return
+            index = length
+        if action in self.coalesced_actions:
+            self._coalesced[key] = (index, kwargs)
+        self._last_index_for_id[object_id] = index
+        self._coalesce_length = len(self.message_queue)
+
+    def _dispatch(self, action: str, kwargs: dict) -> None:
+        method = self.actions.get(action)
         try:
-            eval('self.' + action)(kwargs)
+            if method is None:
+                method = getattr(self, action)
+                self.actions[action] = method
+            self._sending_action = action
+            try:
+                method(kwargs)
+            finally:
+                self._sending_action = None
         except AttributeError:
             print('There is no action called \'%s\' or this function has bug, please fix it.' % action)
             exit(-1)
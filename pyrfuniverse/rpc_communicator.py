@@ -1,9 +1,10 @@
 import grpc
-from typing import Optional
+from typing import Any, Optional, Tuple
 
-from multiprocessing import Pipe
+from collections import deque
 from sys import platform
 import socket
+import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
 
@@ -18,9 +19,82 @@ from pyrfuniverse.communicator_objects.unity_output_pb2 import UnityOutputProto
 from .exception import UnityTimeOutException, UnityWorkerInUseException
 
 
+class _Queue:
+    """
+    One direction of a Connection pair: messages waiting to be received, guarded by a condition variable.
+    """
+
+    def __init__(self):
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+
+    def put(self, item: Any) -> None:
+        with self.condition:
+            self.items.append(item)
+            self.condition.notify()
+
+    def close(self) -> None:
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class Connection:
+    """
+    End of an in-process pipe between the grpc servicer thread and the main thread. It has the send, recv,
+    poll and close methods of multiprocessing connections, but hands over references to the messages instead
+    of pickling them, since both ends live in the same process.
+    """
+
+    def __init__(self, incoming: _Queue, outgoing: _Queue):
+        self.incoming = incoming
+        self.outgoing = outgoing
+
+    def send(self, obj: Any) -> None:
+        if self.outgoing.closed:
+            raise OSError("connection is closed")
+        self.outgoing.put(obj)
+
+    def recv(self) -> Any:
+        """
+        Blocks until a message is available. Raises EOFError if there is none left and either end was closed.
+        """
+        with self.incoming.condition:
+            self.incoming.condition.wait_for(
+                lambda: self.incoming.items or self.incoming.closed
+            )
+            if not self.incoming.items:
+                raise EOFError
+            return self.incoming.items.popleft()
+
+    def poll(self, timeout: Optional[float] = 0.0) -> bool:
+        """
+        Returns whether a message is available, waiting at most timeout seconds (forever if None).
+        """
+        with self.incoming.condition:
+            return bool(
+                self.incoming.condition.wait_for(
+                    lambda: self.incoming.items or self.incoming.closed, timeout
+                )
+            )
+
+    def close(self) -> None:
+        self.incoming.close()
+        self.outgoing.close()
+
+
+def in_process_pipe() -> Tuple[Connection, Connection]:
+    """
+    Returns the two ends of an in-process pipe, like multiprocessing.Pipe().
+    """
+    first, second = _Queue(), _Queue()
+    return Connection(first, second), Connection(second, first)
+
+
 class UnityToExternalServicerImplementation(UnityToExternalProtoServicer):
     def __init__(self):
-        self.parent_conn, self.child_conn = Pipe()
+        self.parent_conn, self.child_conn = in_process_pipe()
 
     def Initialize(self, request, context):
         self.child_conn.send(request)
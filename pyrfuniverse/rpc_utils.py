@@ -17,11 +17,22 @@ from pyrfuniverse.communicator_objects.observation_pb2 import (
 from pyrfuniverse.communicator_objects.brain_parameters_pb2 import BrainParametersProto
 import numpy as np
 import io
+import itertools
+import struct
 from typing import cast, List, Tuple, Collection, Optional, Iterable
 from PIL import Image
+from google.protobuf.internal import api_implementation
 
 
 PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+# Number of channels for each PNG color type, palette images are not supported.
+PNG_CHANNELS = {0: 1, 2: 3, 4: 2, 6: 4}
+# Native protobuf backends serialize a packed repeated float field as one copy of its little-endian floats,
+# while the pure Python backend encodes them one by one.
+NATIVE_PROTOBUF = api_implementation.Type() != "python"
+# Vector observations are converted in blocks of about this many bytes, each checked for NaN and Infinite
+# values right after it is written, while it is still in cache.
+OBSERVATION_BLOCK_BYTES = 1 << 15
 
 
 def behavior_spec_from_proto(
@@ -102,16 +113,74 @@ class OffsetBytesIO:
         return self.fp.tell()
 
 
-@timed
-def process_pixels(
-    image_bytes: bytes, expected_channels: int, mappings: Optional[List[int]] = None
-) -> np.ndarray:
+def _get_png_layout(image_bytes: bytes) -> Optional[List[Tuple[int, int, int, int, int]]]:
     """
-    Converts byte array observation image into numpy array, re-sizes it,
-    and optionally converts it to grey scale
-    :param image_bytes: input byte array corresponding to image
-    :param expected_channels: Expected output channels
-    :return: processed numpy array of observation from environment
+    Finds where each image of concatenated PNGs starts and ends by walking their chunk lengths, and reads
+    their size and number of channels from the IHDR chunk.
+    :param image_bytes: input byte array of concatenated PNGs
+    :return: a (start, end, height, width, channels) tuple per image, or None if the bytes can't be split
+    this way (for example images with 16 bit channels), in which case the images must be scanned for instead.
+    """
+    layout = []
+    offset = 0
+    total = len(image_bytes)
+    while offset < total:
+        if image_bytes[offset : offset + 8] != PNG_HEADER:
+            return None
+        start = offset
+        offset += 8
+        shape = None
+        chunk_type = None
+        while chunk_type != b"IEND":
+            if offset + 8 > total:
+                return None
+            length, chunk_type = struct.unpack_from(">I4s", image_bytes, offset)
+            if chunk_type == b"IHDR":
+                width, height, bit_depth, color_type = struct.unpack_from(
+                    ">IIBB", image_bytes, offset + 8
+                )
+                if bit_depth != 8 or color_type not in PNG_CHANNELS:
+                    return None
+                shape = (height, width, PNG_CHANNELS[color_type])
+            # length, chunk type, data and CRC
+            offset += 12 + length
+        if shape is None or offset > total:
+            return None
+        layout.append((start, offset) + shape)
+    return layout
+
+
+def _decode_pngs_into_buffer(
+    image_bytes: bytes, layout: List[Tuple[int, int, int, int, int]]
+) -> Optional[np.ndarray]:
+    """
+    Decodes every image of concatenated PNGs into one preallocated (height, width, channels) uint8 buffer,
+    the channels of each image following those of the previous one.
+    """
+    height, width = layout[0][2], layout[0][3]
+    if any(image[2] != height or image[3] != width for image in layout):
+        return None
+    pixels = np.empty((height, width, sum(image[4] for image in layout)), dtype=np.uint8)
+    image_fp = OffsetBytesIO(image_bytes)
+    channel = 0
+    for start, _, _, _, channels in layout:
+        image_fp.offset = start
+        with hierarchical_timer("image_decompress"):
+            image = Image.open(image_fp)
+            # Normally Image loads lazily, load() forces it to do loading in the timer scope.
+            image.load()
+        pixels[:, :, channel : channel + channels] = np.asarray(image).reshape(
+            height, width, channels
+        )
+        channel += channels
+    return pixels
+
+
+def _decode_pngs_by_scanning(image_bytes: bytes) -> Tuple[np.ndarray, int]:
+    """
+    Decodes concatenated PNGs of unknown sizes, looking for the header of each image after the previous one,
+    and stacks their channels into one (height, width, channels) array.
+    :return: the stacked array and the number of channels of the first image
     """
     image_fp = OffsetBytesIO(image_bytes)
 
@@ -122,7 +191,10 @@ def process_pixels(
             image = Image.open(image_fp)
             # Normally Image loads lazily, load() forces it to do loading in the timer scope.
             image.load()
-        image_arrays.append(np.array(image, dtype=np.float32) / 255.0)
+        image_array = np.array(image)
+        if image_array.ndim == 2:
+            image_array = image_array[:, :, np.newaxis]
+        image_arrays.append(image_array)
 
         # Look for the next header, starting from the current stream location
         try:
@@ -131,63 +203,125 @@ def process_pixels(
         except ValueError:
             # Didn't find the header, so must be at the end.
             break
+    return np.concatenate(image_arrays, axis=2), image_arrays[0].shape[2]
+
+
+@timed
+def process_pixels(
+    image_bytes: bytes,
+    expected_channels: int,
+    mappings: Optional[List[int]] = None,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Converts byte array observation image into numpy array, re-sizes it,
+    and optionally converts it to grey scale
+    :param image_bytes: input byte array corresponding to image
+    :param expected_channels: Expected output channels
+    :param mappings: optional compressed channel mapping of the observation
+    :param out: optional float32 or uint8 array to write the observation into. A float32 array receives
+    values in [0, 1], a uint8 array receives the pixel values in [0, 255].
+    :return: processed numpy array of observation from environment
+    """
+    pixels = None
+    layout = _get_png_layout(image_bytes)
+    if layout:
+        pixels = _decode_pngs_into_buffer(image_bytes, layout)
+        first_image_channels = layout[0][4]
+    if pixels is None:
+        pixels, first_image_channels = _decode_pngs_by_scanning(image_bytes)
 
     if mappings is not None and len(mappings) > 0:
-        return _process_images_mapping(image_arrays, mappings)
+        return _process_images_mapping(pixels, mappings, out)
     else:
-        return _process_images_num_channels(image_arrays, expected_channels)
+        return _process_images_num_channels(
+            pixels, expected_channels, out, first_image_channels
+        )
 
 
-def _process_images_mapping(image_arrays, mappings):
+def _output_buffer(shape: Tuple[int, ...], out: Optional[np.ndarray]) -> np.ndarray:
     """
-    Helper function for processing decompressed images with compressed channel mappings.
+    Returns out, or a new float32 array if it wasn't given, after checking the decompressed observation fits it.
+    """
+    if out is None:
+        return np.empty(shape, dtype=np.float32)
+    if out.shape != shape:
+        raise UnityObservationException(
+            f"Decompressed observation did not have the expected shape - "
+            f"decompressed had {shape} but expected {out.shape}"
+        )
+    return out
+
+
+def _write_pixels(values: np.ndarray, out: np.ndarray) -> np.ndarray:
     """
-    image_arrays = np.concatenate(image_arrays, axis=2).transpose((2, 0, 1))
+    Writes pixel values in [0, 255] into out, scaled to [0, 1] unless out is a uint8 array.
+    """
+    if out.dtype == np.uint8:
+        if values.dtype == np.uint8:
+            out[...] = values
+        else:
+            np.rint(values, out=values)
+            out[...] = values
+    else:
+        np.divide(values, np.float32(255.0), out=out)
+    return out
+
 
-    if len(mappings) != len(image_arrays):
+def _process_images_mapping(pixels, mappings, out=None):
+    """
+    Helper function for processing decompressed images with compressed channel mappings.
+    Each output channel is the mean of the input channels mapped to it, computed for all output channels
+    with a single product against an averaging matrix.
+    """
+    num_channels = pixels.shape[2]
+    if len(mappings) != num_channels:
         raise UnityObservationException(
             f"Compressed observation and its mapping had different number of channels - "
-            f"observation had {len(image_arrays)} channels but its mapping had {len(mappings)} channels"
+            f"observation had {num_channels} channels but its mapping had {len(mappings)} channels"
         )
     if len({m for m in mappings if m > -1}) != max(mappings) + 1:
         raise UnityObservationException(
             f"Invalid Compressed Channel Mapping: the mapping {mappings} does not have the correct format."
         )
-    if max(mappings) >= len(image_arrays):
+    if max(mappings) >= num_channels:
         raise UnityObservationException(
             f"Invalid Compressed Channel Mapping: the mapping has index larger than the total "
             f"number of channels in observation - mapping index {max(mappings)} is"
-            f"invalid for input observation with {len(image_arrays)} channels."
+            f"invalid for input observation with {num_channels} channels."
         )
 
-    processed_image_arrays: List[np.array] = [[] for _ in range(max(mappings) + 1)]
-    for mapping_idx, img in zip(mappings, image_arrays):
+    averaging = np.zeros((num_channels, max(mappings) + 1), dtype=np.float32)
+    for channel, mapping_idx in enumerate(mappings):
         if mapping_idx > -1:
-            processed_image_arrays[mapping_idx].append(img)
-
-    for i, img_array in enumerate(processed_image_arrays):
-        processed_image_arrays[i] = np.mean(img_array, axis=0)
-    img = np.stack(processed_image_arrays, axis=2)
-    return img
+            averaging[channel, mapping_idx] = 1.0
+    averaging /= averaging.sum(axis=0)
+    out = _output_buffer(pixels.shape[:2] + (averaging.shape[1],), out)
+    return _write_pixels(pixels.astype(np.float32) @ averaging, out)
 
 
-def _process_images_num_channels(image_arrays, expected_channels):
+def _process_images_num_channels(
+    pixels, expected_channels, out=None, first_image_channels=None
+):
     """
     Helper function for processing decompressed images with number of expected channels.
     This is for old API without mapping provided. Use the first n channel, n=expected_channels.
+    :param first_image_channels: number of channels of the first image, which is averaged into grayscale.
+    All the channels if None.
     """
     if expected_channels == 1:
-        # Convert to grayscale
-        img = np.mean(image_arrays[0], axis=2)
-        img = np.reshape(img, [img.shape[0], img.shape[1], 1])
+        # Convert the first image to grayscale
+        if first_image_channels is None:
+            first_image_channels = pixels.shape[2]
+        values = np.mean(
+            pixels[..., 0:first_image_channels], axis=2, dtype=np.float32, keepdims=True
+        )
     else:
-        img = np.concatenate(image_arrays, axis=2)
         # We can drop additional channels since they may need to be added to include
         # numbers of observation channels not divisible by 3.
-        actual_channels = list(img.shape)[2]
-        if actual_channels > expected_channels:
-            img = img[..., 0:expected_channels]
-    return img
+        values = pixels[..., 0:expected_channels]
+    out = _output_buffer(values.shape, out)
+    return _write_pixels(values, out)
 
 
 def _check_observations_match_spec(
@@ -212,12 +346,16 @@ def _check_observations_match_spec(
 
 @timed
 def _observation_to_np_array(
-    obs: ObservationProto, expected_shape: Optional[Iterable[int]] = None
+    obs: ObservationProto,
+    expected_shape: Optional[Iterable[int]] = None,
+    out: Optional[np.ndarray] = None,
 ) -> np.ndarray:
     """
     Converts observation proto into numpy array of the appropriate size.
     :param obs: observation proto to be converted
     :param expected_shape: optional shape information, used for sanity checks.
+    :param out: optional array to write the observation into, uint8 arrays are only supported for
+    compressed observations.
     :return: processed numpy array of observation from environment
     """
     if expected_shape is not None:
@@ -229,10 +367,16 @@ def _observation_to_np_array(
     if obs.compression_type == COMPRESSION_TYPE_NONE:
         img = np.array(obs.float_data.data, dtype=np.float32)
         img = np.reshape(img, obs.shape)
+        if out is not None:
+            out[...] = img
+            return out
         return img
     else:
         img = process_pixels(
-            obs.compressed_data, expected_channels, list(obs.compressed_channel_mapping)
+            obs.compressed_data,
+            expected_channels,
+            list(obs.compressed_channel_mapping),
+            out,
         )
         # Compare decompressed image size to observation shape and make sure they match
         if list(obs.shape) != list(img.shape):
@@ -248,35 +392,45 @@ def _process_maybe_compressed_observation(
     obs_index: int,
     observation_spec: ObservationSpec,
     agent_info_list: Collection[AgentInfoProto],
+    uint8_visual: bool = False,
 ) -> np.ndarray:
     shape = cast(Tuple[int, int, int], observation_spec.shape)
+    # Pixel values can only be kept as uint8 when every agent sent a compressed image.
+    dtype = np.float32
+    if uint8_visual and all(
+        agent_obs.observations[obs_index].compression_type != COMPRESSION_TYPE_NONE
+        for agent_obs in agent_info_list
+    ):
+        dtype = np.uint8
     if len(agent_info_list) == 0:
-        return np.zeros((0, shape[0], shape[1], shape[2]), dtype=np.float32)
+        return np.zeros((0, shape[0], shape[1], shape[2]), dtype=dtype)
 
+    batched_visual = np.empty((len(agent_info_list),) + tuple(shape), dtype=dtype)
     try:
-        batched_visual = [
-            _observation_to_np_array(agent_obs.observations[obs_index], shape)
-            for agent_obs in agent_info_list
-        ]
+        for agent_index, agent_obs in enumerate(agent_info_list):
+            _observation_to_np_array(
+                agent_obs.observations[obs_index], shape, batched_visual[agent_index]
+            )
     except ValueError:
         # Try to get a more useful error message
         _check_observations_match_spec(obs_index, observation_spec, agent_info_list)
         # If that didn't raise anything, raise the original error
         raise
-    return np.array(batched_visual, dtype=np.float32)
+    return batched_visual
 
 
 def _raise_on_nan_and_inf(data: np.array, source: str) -> np.array:
     # Check for NaNs or Infinite values in the observation or reward data.
-    # If there's a NaN in the observations, the np.mean() result will be NaN
-    # If there's an Infinite value (either sign) then the result will be Inf
+    # If there's a NaN in the observations, their sum will be NaN
+    # If there's an Infinite value (either sign) then the sum will be Inf
     # See https://stackoverflow.com/questions/6736590/fast-check-for-nan-in-numpy for background
-    # Note that a very large values (larger than sqrt(float_max)) will result in an Inf value here
+    # Note that a very large values (larger than float_max / data.size) will result in an Inf value here
     # Raise a Runtime error in the case that NaNs or Infinite values make it into the data.
+    # np.add.reduce is the sum np.mean() does, without its Python overhead and final division.
     if data.size == 0:
         return data
 
-    d = np.mean(data)
+    d = np.add.reduce(data, axis=None)
     has_nan = np.isnan(d)
     has_inf = not np.isfinite(d)
 
@@ -286,6 +440,48 @@ def _raise_on_nan_and_inf(data: np.array, source: str) -> np.array:
         raise RuntimeError(f"The {source} provided had Infinite values.")
 
 
+def _float_data_to_np_array(
+    float_data_list: List[ObservationProto.FloatData], shape: Tuple[int, ...]
+) -> np.ndarray:
+    """
+    Converts the float data of each agent into one (n_agents,) + shape float32 array, without going through
+    a Python float per value when the protobuf backend is native. The values are checked for NaN and Infinite
+    values block by block as they are converted, see OBSERVATION_BLOCK_BYTES, so the batch needs no separate pass.
+    :param float_data_list: float data of the same observation for each agent
+    :param shape: shape of the observation of one agent
+    :return: batch of the observations
+    """
+    size = int(np.prod(shape))
+    for float_data in float_data_list:
+        if len(float_data.data) != size:
+            raise ValueError(
+                f"Observation had {len(float_data.data)} values but expected {size}."
+            )
+    np_obs = np.empty((len(float_data_list), size), dtype=np.float32)
+    n_bytes = 4 * size
+    agents_per_block = max(1, OBSERVATION_BLOCK_BYTES // max(1, n_bytes))
+    for start in range(0, len(float_data_list), agents_per_block):
+        block_data = float_data_list[start : start + agents_per_block]
+        block = np_obs[start : start + len(block_data)]
+        if NATIVE_PROTOBUF:
+            for agent_index, float_data in enumerate(block_data):
+                # data is the only field, so the packed floats are the end of the message.
+                packed = float_data.SerializeToString()
+                block[agent_index] = np.frombuffer(
+                    packed, dtype="<f4", count=size, offset=len(packed) - n_bytes
+                )
+        else:
+            block[...] = np.fromiter(
+                itertools.chain.from_iterable(
+                    float_data.data for float_data in block_data
+                ),
+                dtype=np.float32,
+                count=block.size,
+            ).reshape(block.shape)
+        _raise_on_nan_and_inf(block, "observations")
+    return np_obs.reshape((len(float_data_list),) + tuple(shape))
+
+
 @timed
 def _process_rank_one_or_two_observation(
     obs_index: int,
@@ -295,25 +491,23 @@ def _process_rank_one_or_two_observation(
     if len(agent_info_list) == 0:
         return np.zeros((0,) + observation_spec.shape, dtype=np.float32)
     try:
-        np_obs = np.array(
-            [
-                agent_obs.observations[obs_index].float_data.data
-                for agent_obs in agent_info_list
-            ],
-            dtype=np.float32,
-        ).reshape((len(agent_info_list),) + observation_spec.shape)
+        np_obs = _float_data_to_np_array(
+            [agent_obs.observations[obs_index].float_data for agent_obs in agent_info_list],
+            observation_spec.shape,
+        )
     except ValueError:
         # Try to get a more useful error message
         _check_observations_match_spec(obs_index, observation_spec, agent_info_list)
         # If that didn't raise anything, raise the original error
         raise
-    _raise_on_nan_and_inf(np_obs, "observations")
     return np_obs
 
 
 @timed
 def steps_from_proto(
-    agent_info_list: Collection[AgentInfoProto], behavior_spec: BehaviorSpec
+    agent_info_list: Collection[AgentInfoProto],
+    behavior_spec: BehaviorSpec,
+    uint8_visual: bool = False,
 ) -> Tuple[DecisionSteps, TerminalSteps]:
     decision_agent_info_list = [
         agent_info for agent_info in agent_info_list if not agent_info.done
@@ -328,12 +522,12 @@ def steps_from_proto(
         if is_visual:
             decision_obs_list.append(
                 _process_maybe_compressed_observation(
-                    obs_index, observation_spec, decision_agent_info_list
+                    obs_index, observation_spec, decision_agent_info_list, uint8_visual
                 )
             )
             terminal_obs_list.append(
                 _process_maybe_compressed_observation(
-                    obs_index, observation_spec, terminal_agent_info_list
+                    obs_index, observation_spec, terminal_agent_info_list, uint8_visual
                 )
             )
         else:
@@ -1,6 +1,8 @@
 from typing import List
 import struct
 
+import numpy as np
+
 
 class IncomingMessage:
     """
@@ -69,6 +71,43 @@ class IncomingMessage:
             output.append(self.read_float32())
         return output
 
+    def read_float32_array(
+        self, default_value: np.ndarray = None, length: int = None
+    ) -> np.ndarray:
+        """
+        Read a list of float values from the message buffer as a NumPy array. The array is a
+        read-only view over the message buffer, so no values are copied.
+        :param default_value: Default value to use if the end of the message is reached.
+        :param length: Number of values to read. If None, the length is read from the message
+        first, which matches the layout of read_float32_list.
+        :return: The value read from the message, or the default value if the end was reached.
+        """
+        return self._read_array(np.dtype("<f4"), default_value, length)
+
+    def read_int32_array(
+        self, default_value: np.ndarray = None, length: int = None
+    ) -> np.ndarray:
+        """
+        Read a list of integer values from the message buffer as a NumPy array. The array is a
+        read-only view over the message buffer, so no values are copied.
+        :param default_value: Default value to use if the end of the message is reached.
+        :param length: Number of values to read. If None, the length is read from the message first.
+        :return: The value read from the message, or the default value if the end was reached.
+        """
+        return self._read_array(np.dtype("<i4"), default_value, length)
+
+    def read_bool_array(
+        self, default_value: np.ndarray = None, length: int = None
+    ) -> np.ndarray:
+        """
+        Read a list of boolean values from the message buffer as a NumPy array. The array is a
+        read-only view over the message buffer, so no values are copied.
+        :param default_value: Default value to use if the end of the message is reached.
+        :param length: Number of values to read. If None, the length is read from the message first.
+        :return: The value read from the message, or the default value if the end was reached.
+        """
+        return self._read_array(np.dtype("?"), default_value, length)
+
     def read_string(self, default_value: str = "") -> str:
         """
         Read a string value from the message buffer.
@@ -79,15 +118,42 @@ class IncomingMessage:
             return default_value
 
         encoded_str_len = self.read_int32()
-        val = self.buffer[self.offset : self.offset + encoded_str_len].decode("ascii")
+        val = str(self.buffer[self.offset : self.offset + encoded_str_len], "ascii")
         self.offset += encoded_str_len
         return val
 
+    def read_bytes(self, default_value: bytes = b"") -> memoryview:
+        """
+        Read a length-prefixed byte string from the message buffer. The result is a memoryview over the
+        message buffer, so no bytes are copied.
+        :param default_value: Default value to use if the end of the message is reached.
+        :return: The value read from the message, or the default value if the end was reached.
+        """
+        if self._at_end_of_buffer():
+            return memoryview(default_value)
+
+        bytes_len = self.read_int32()
+        val = memoryview(self.buffer)[self.offset : self.offset + bytes_len]
+        self.offset += bytes_len
+        return val
+
     def get_raw_bytes(self) -> bytes:
         """
         Get a copy of the internal bytes used by the message.
         """
         return bytearray(self.buffer)
 
+    def _read_array(
+        self, dtype: np.dtype, default_value: np.ndarray, length: int
+    ) -> np.ndarray:
+        if self._at_end_of_buffer():
+            return np.empty(0, dtype=dtype) if default_value is None else default_value
+
+        if length is None:
+            length = self.read_int32()
+        val = np.frombuffer(self.buffer, dtype=dtype, count=length, offset=self.offset)
+        self.offset += length * dtype.itemsize
+        return val
+
     def _at_end_of_buffer(self) -> bool:
         return self.offset >= len(self.buffer)
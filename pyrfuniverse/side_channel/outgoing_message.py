@@ -1,6 +1,8 @@
 from typing import List
 import struct
 
+import numpy as np
+
 from pyrfuniverse.logging_util import get_logger
 
 logger = get_logger(__name__)
@@ -41,8 +43,43 @@ class OutgoingMessage:
         Append a list of float values. They will be truncated to 32-bit precision.
         """
         self.write_int32(len(float_list))
-        for f in float_list:
-            self.write_float32(f)
+        self.buffer += struct.pack(f"<{len(float_list)}f", *float_list)
+
+    def write_float32_array(self, float_array: np.ndarray, write_length: bool = True) -> None:
+        """
+        Append an array of float values. They will be truncated to 32-bit precision.
+        The whole array is serialized at once, in C order for arrays with more than one dimension.
+        :param float_array: Array (or anything accepted by np.asarray) of values to write.
+        :param write_length: If True, the number of values is written first, which matches the layout of
+        write_float32_list. Otherwise only the values are written.
+        """
+        array = np.ascontiguousarray(float_array, dtype="<f4")
+        if write_length:
+            self.write_int32(array.size)
+        self.buffer += array.tobytes()
+
+    def write_float32_rows(self, float_rows: np.ndarray) -> None:
+        """
+        Append each row of a 2-d array as a list of float values. The layout is the same as calling
+        write_float32_list on every row, but the rows are serialized at once.
+        """
+        rows = np.asarray(float_rows, dtype="<f4")
+        packed = np.empty((rows.shape[0], rows.shape[1] + 1), dtype="<f4")
+        packed[:, 0].view("<i4")[:] = rows.shape[1]
+        packed[:, 1:] = rows
+        self.buffer += packed.tobytes()
+
+    def write_int32_array(self, int_array: np.ndarray, write_length: bool = True) -> None:
+        """
+        Append an array of integer values. The whole array is serialized at once.
+        :param int_array: Array (or anything accepted by np.asarray) of values to write.
+        :param write_length: If True, the number of values is written first. Otherwise only the values are
+        written.
+        """
+        array = np.ascontiguousarray(int_array, dtype="<i4")
+        if write_length:
+            self.write_int32(array.size)
+        self.buffer += array.tobytes()
 
     def write_string(self, s: str) -> None:
         """
@@ -53,6 +90,15 @@ class OutgoingMessage:
         self.write_int32(len(encoded_key))
         self.buffer += encoded_key
 
+    def write_bytes(self, b: bytes) -> None:
+        """
+        Append a byte string (or any object supporting the buffer protocol). Its length will also be
+        written to the message.
+        """
+        view = memoryview(b).cast("B")
+        self.write_int32(len(view))
+        self.buffer += view
+
     def set_raw_bytes(self, buffer: bytearray) -> None:
         """
         Set the internal buffer to a new bytearray. This will overwrite any existing data.
@@ -5,25 +5,33 @@ from pyrfuniverse.side_channel import SideChannel, IncomingMessage
 from pyrfuniverse.exception import UnityEnvironmentException
 from pyrfuniverse.logging_util import get_logger
 
+# Each message is framed by the 16 bytes of its channel id (as in UUID.bytes_le) and its int32 length.
+MESSAGE_HEADER = struct.Struct("<16si")
+
 
 class SideChannelManager:
     def __init__(self, side_channels=Optional[List[SideChannel]]):
         self._side_channels_dict = self._get_side_channels_dict(side_channels)
+        # The same channels keyed by the raw bytes of their id, as they appear in messages.
+        self._side_channels_by_key = {
+            channel_id.bytes_le: channel
+            for channel_id, channel in self._side_channels_dict.items()
+        }
 
     def process_side_channel_message(self, data: bytes) -> None:
         """
         Separates the data received from Python into individual messages for each
         registered side channel and calls on_message_received on them.
+        The messages are memoryviews over data, so their bytes are not copied.
         :param data: The packed message sent by Unity
         """
+        view = memoryview(data)
         offset = 0
-        while offset < len(data):
+        while offset < len(view):
             try:
-                channel_id = uuid.UUID(bytes_le=bytes(data[offset : offset + 16]))
-                offset += 16
-                message_len, = struct.unpack_from("<i", data, offset)
-                offset = offset + 4
-                message_data = data[offset : offset + message_len]
+                channel_key, message_len = MESSAGE_HEADER.unpack_from(view, offset)
+                offset += MESSAGE_HEADER.size
+                message_data = view[offset : offset + message_len]
                 offset = offset + message_len
             except (struct.error, ValueError, IndexError):
                 raise UnityEnvironmentException(
@@ -35,31 +43,50 @@ class SideChannelManager:
                 raise UnityEnvironmentException(
                     "The message received by the side channel {} was "
                     "unexpectedly short. Make sure your Unity Environment "
-                    "sending side channel data properly.".format(channel_id)
-                )
-            if channel_id in self._side_channels_dict:
-                incoming_message = IncomingMessage(message_data)
-                self._side_channels_dict[channel_id].on_message_received(
-                    incoming_message
+                    "sending side channel data properly.".format(
+                        uuid.UUID(bytes_le=channel_key)
+                    )
                 )
+            channel = self._side_channels_by_key.get(channel_key)
+            if channel is not None:
+                channel.on_message_received(IncomingMessage(message_data))
             else:
                 get_logger(__name__).warning(
-                    f"Unknown side channel data received. Channel type: {channel_id}."
+                    "Unknown side channel data received. Channel type: "
+                    f"{uuid.UUID(bytes_le=channel_key)}."
                 )
 
-    def generate_side_channel_messages(self) -> bytearray:
+    def generate_side_channel_messages(self) -> bytes:
         """
         Gathers the messages that the registered side channels will send to Unity
-        and combines them into a single message ready to be sent.
+        and combines them into a single message ready to be sent. The message is
+        built by a single join, which allocates it once at its final size.
         """
-        result = bytearray()
-        for channel_id, channel in self._side_channels_dict.items():
+        parts = []
+        for channel_key, channel in self._side_channels_by_key.items():
             for message in channel.message_queue:
-                result += channel_id.bytes_le
-                result += struct.pack("<i", len(message))
-                result += message
+                parts.append(MESSAGE_HEADER.pack(channel_key, len(message)))
+                parts.append(message)
             channel.message_queue = []
-        return result
+        return b"".join(parts)
+
+    def register_side_channel(self, side_channel: SideChannel) -> None:
+        """
+        Registers a side channel after the manager was created, replacing the side channel
+        registered with the same id if any.
+        :param side_channel: The side channel to register.
+        """
+        self._side_channels_dict[side_channel.channel_id] = side_channel
+        self._side_channels_by_key[side_channel.channel_id.bytes_le] = side_channel
+
+    def unregister_side_channel(self, side_channel: SideChannel) -> None:
+        """
+        Unregisters a side channel, if it is the one registered with its id.
+        :param side_channel: The side channel to unregister.
+        """
+        if self._side_channels_dict.get(side_channel.channel_id) is side_channel:
+            del self._side_channels_dict[side_channel.channel_id]
+            del self._side_channels_by_key[side_channel.channel_id.bytes_le]
 
     @staticmethod
     def _get_side_channels_dict(
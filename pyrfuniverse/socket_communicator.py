@@ -0,0 +1,175 @@
+import os
+import select
+import socket
+import struct
+import tempfile
+import time
+from typing import Optional
+
+from .communicator import Communicator, PollCallback
+from pyrfuniverse.communicator_objects.unity_message_pb2 import UnityMessageProto
+from pyrfuniverse.communicator_objects.unity_input_pb2 import UnityInputProto
+from pyrfuniverse.communicator_objects.unity_output_pb2 import UnityOutputProto
+from .exception import (
+    UnityCommunicationException,
+    UnityEnvironmentException,
+    UnityTimeOutException,
+    UnityWorkerInUseException,
+)
+
+# Each message is sent as its little-endian int32 length followed by the serialized UnityMessageProto.
+FRAME_HEADER = struct.Struct("<i")
+
+
+def get_socket_path(port: int) -> str:
+    """
+    Returns the path of the Unix domain socket used for the given port.
+    """
+    return os.path.join(tempfile.gettempdir(), f"rfuniverse-{port}.sock")
+
+
+class SocketCommunicator(Communicator):
+    def __init__(self, worker_id=0, base_port=5005, timeout_wait=30):
+        """
+        Python side of the Unix domain socket communication, for Unity running on the same machine.
+        Python is the server and Unity the client, which connects to get_socket_path(base_port + worker_id).
+        Messages are the same UnityMessageProto as with grpc, exchanged in the same order, but without the
+        grpc server and the pipe to its thread in between.
+
+        :int base_port: Baseline port number, the socket path is derived from base_port + worker_id.
+        :int worker_id: Offset from base_port. Used for training multiple environments simultaneously.
+        :int timeout_wait: Timeout (in seconds) to wait for a response before exiting.
+        """
+        super().__init__(worker_id, base_port)
+        if not hasattr(socket, "AF_UNIX"):
+            raise UnityEnvironmentException(
+                "Unix domain sockets are not available on this platform, use the grpc communicator instead."
+            )
+        self.port = base_port + worker_id
+        self.worker_id = worker_id
+        self.timeout_wait = timeout_wait
+        self.path = get_socket_path(self.port)
+        self.server: Optional[socket.socket] = None
+        self.conn: Optional[socket.socket] = None
+        self.buffer = bytearray(1 << 16)
+        self.is_open = False
+        self.create_server()
+
+    def create_server(self):
+        """
+        Creates the listening socket, removing the file of a previous environment that wasn't closed.
+        """
+        if os.path.exists(self.path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+            except OSError:
+                os.unlink(self.path)
+            else:
+                raise UnityWorkerInUseException(self.worker_id)
+            finally:
+                probe.close()
+
+        try:
+            self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.server.bind(self.path)
+            self.server.listen(1)
+            self.is_open = True
+        except OSError:
+            raise UnityWorkerInUseException(self.worker_id)
+
+    def poll_for_timeout(self, poll_callback: Optional[PollCallback] = None) -> None:
+        """
+        Waits for Unity to connect, then for a message to be readable, like RpcCommunicator.poll_for_timeout.
+        """
+        deadline = time.monotonic() + self.timeout_wait
+        callback_timeout_wait = self.timeout_wait // 10
+        while time.monotonic() < deadline:
+            waiting_for = self.conn if self.conn is not None else self.server
+            readable, _, _ = select.select([waiting_for], [], [], callback_timeout_wait)
+            if readable:
+                if self.conn is not None:
+                    # Got an acknowledgment from the connection
+                    return
+                self.conn, _ = self.server.accept()
+                continue
+            if poll_callback:
+                # Fire the callback - if it detects something wrong, it should raise an exception.
+                poll_callback()
+
+        # Got this far without reading any data from the connection, so it must be dead.
+        raise UnityTimeOutException(
+            "The Unity environment took too long to respond. Make sure that :\n"
+            "\t The environment does not need user interaction to launch\n"
+            '\t The Agents\' Behavior Parameters > Behavior Type is set to "Default"\n'
+            "\t The environment and the Python interface have compatible versions.\n"
+            "\t The environment was started with the socket communicator."
+        )
+
+    def _recv_into(self, view: memoryview) -> None:
+        while len(view) > 0:
+            received = self.conn.recv_into(view)
+            if received == 0:
+                raise UnityCommunicationException("The Unity environment closed the connection.")
+            view = view[received:]
+
+    def _recv_message(self) -> UnityMessageProto:
+        self._recv_into(memoryview(self.buffer)[: FRAME_HEADER.size])
+        (length,) = FRAME_HEADER.unpack_from(self.buffer)
+        if length > len(self.buffer):
+            self.buffer = bytearray(max(length, 2 * len(self.buffer)))
+        view = memoryview(self.buffer)[:length]
+        self._recv_into(view)
+        message = UnityMessageProto()
+        message.ParseFromString(view)
+        return message
+
+    def _send_message(self, message: UnityMessageProto) -> None:
+        payload = message.SerializeToString()
+        self.conn.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+    def initialize(
+        self, inputs: UnityInputProto, poll_callback: Optional[PollCallback] = None
+    ) -> UnityOutputProto:
+        self.poll_for_timeout(poll_callback)
+        aca_param = self._recv_message().unity_output
+        message = UnityMessageProto()
+        message.header.status = 200
+        message.unity_input.CopyFrom(inputs)
+        self._send_message(message)
+        self.poll_for_timeout(poll_callback)
+        self._recv_message()
+        return aca_param
+
+    def exchange(
+        self, inputs: UnityInputProto, poll_callback: Optional[PollCallback] = None
+    ) -> Optional[UnityOutputProto]:
+        message = UnityMessageProto()
+        message.header.status = 200
+        message.unity_input.CopyFrom(inputs)
+        self._send_message(message)
+        self.poll_for_timeout(poll_callback)
+        output = self._recv_message()
+        if output.header.status != 200:
+            return None
+        return output.unity_output
+
+    def close(self):
+        """
+        Sends a shutdown signal to the unity environment, and closes the socket.
+        """
+        if self.is_open:
+            if self.conn is not None:
+                message_input = UnityMessageProto()
+                message_input.header.status = 400
+                try:
+                    self._send_message(message_input)
+                except OSError:
+                    # Unity already closed its side.
+                    pass
+                self.conn.close()
+                self.conn = None
+            self.server.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            self.is_open = False
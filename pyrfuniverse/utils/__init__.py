@@ -1,6 +1,7 @@
 from .controller import RFUniverseController
 from .tobor_controller import RFUniverseToborController
+from .kinematics import KinematicChain
 
 __all__ = [
-    'RFUniverseController', 'RFUniverseToborController'
+    'RFUniverseController', 'RFUniverseToborController', 'KinematicChain'
 ]
\ No newline at end of file
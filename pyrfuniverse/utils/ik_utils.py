@@ -0,0 +1,180 @@
+import copy
+import functools
+from collections import OrderedDict
+
+import numpy as np
+
+
+def get_bullet_positions_from_unity(unity_positions) -> np.ndarray:
+    """Convert an (N, 3) array of Unity positions to pybullet positions, like get_bullet_pos_from_unity() of
+    the controllers."""
+    positions = np.array(unity_positions, dtype=np.float64).reshape(-1, 3)
+    positions[:, 0] *= -1
+    return positions
+
+
+def get_movable_joint_ids(bullet_client, robot_id) -> list:
+    """The joints calculateInverseKinematics() returns positions for, in the same order."""
+    return [
+        j for j in range(bullet_client.getNumJoints(robot_id))
+        if bullet_client.getJointInfo(robot_id, j)[2] != bullet_client.JOINT_FIXED
+    ]
+
+
+def calculate_ik_batch(
+        bullet_client,
+        robot_id,
+        end_effector_id,
+        positions,
+        orientations=None,
+        initial_joint_positions=None,
+        tolerance=1e-3,
+        max_iterations=10,
+        max_num_iterations=20,
+        reset_joint_ids=None,
+        **ik_kwargs
+) -> np.ndarray:
+    """Solve inverse kinematics for a batch of end effector targets, in pybullet coordinates.
+
+    Targets are solved in order and each one starts from the solution of the previous one, so consecutive
+    targets of a trajectory converge in a few iterations. For each target, calculateInverseKinematics() is
+    called until the end effector is within tolerance of the target, at most max_iterations times. The robot
+    is left at the last solution.
+
+    Args:
+        bullet_client: The pybullet module or a BulletClient.
+        robot_id: The pybullet body of the robot.
+        end_effector_id: The link of the end effector.
+        positions: (N, 3) array of target positions.
+        orientations: Optional. A quaternion for every target, or an (N, 4) array of quaternions.
+        initial_joint_positions: Optional. Positions of the movable joints to start the first target from,
+            instead of the current state of the robot.
+        tolerance: Distance to the target, in meters, under which a solution is accepted.
+        max_iterations: Maximum number of calculateInverseKinematics() calls per target.
+        max_num_iterations: Iterations of each calculateInverseKinematics() call.
+        reset_joint_ids: Optional. The joints set to each solution, the i-th one to the i-th solved position, as
+            calculate_ik() of the controllers does with their arm joints. All movable joints if None.
+        ik_kwargs: Other arguments of calculateInverseKinematics(), such as null space limits.
+
+    Returns:
+        (N, M) array of the positions of the M movable joints, in radians.
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    if orientations is not None:
+        orientations = np.broadcast_to(np.asarray(orientations, dtype=np.float64), (len(positions), 4))
+    joint_ids = get_movable_joint_ids(bullet_client, robot_id)
+    if reset_joint_ids is None:
+        reset_joint_ids = joint_ids
+    if initial_joint_positions is not None:
+        for idx, joint_position in zip(joint_ids, initial_joint_positions):
+            bullet_client.resetJointState(robot_id, idx, joint_position)
+
+    solutions = np.empty((len(positions), len(joint_ids)))
+    for n, position in enumerate(positions):
+        position = position.tolist()
+        if orientations is not None:
+            ik_kwargs['targetOrientation'] = orientations[n].tolist()
+        for iteration in range(max_iterations):
+            joint_positions = bullet_client.calculateInverseKinematics(
+                robot_id, end_effector_id, position, maxNumIterations=max_num_iterations,
+                residualThreshold=tolerance, **ik_kwargs)
+            for idx, joint_position in zip(reset_joint_ids, joint_positions):
+                bullet_client.resetJointState(robot_id, idx, joint_position)
+            link_state = bullet_client.getLinkState(robot_id, end_effector_id, computeForwardKinematics=True)
+            if np.linalg.norm(np.subtract(link_state[4], position)) < tolerance:
+                break
+        solutions[n] = joint_positions
+
+    return solutions
+
+
+class IKCache:
+    """LRU cache of inverse kinematics solutions. Targets and seed joint states are quantized to tolerance, so
+    revisiting a waypoint from the same state skips the solver. Assign one to the ik_cache attribute of a
+    controller to cache its calculate_ik() and calculate_ik_recursive(). Each controller needs its own cache.
+    """
+
+    def __init__(self, maxsize=1024, tolerance=1e-4):
+        """
+        Args:
+            maxsize: Maximum number of solutions kept, the least recently used one is evicted first.
+            tolerance: Quantization step of target positions, orientations and seed joint positions.
+        """
+        self.maxsize = maxsize
+        self.tolerance = tolerance
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._joint_ids = {}
+
+    def _quantize(self, value):
+        if value is None or isinstance(value, str):
+            return value
+        value = np.asarray(value, dtype=np.float64)
+        return value.shape, np.round(value / self.tolerance).astype(np.int64).tobytes()
+
+    def make_key(self, name, args, kwargs, seed) -> tuple:
+        return (
+            name,
+            tuple(self._quantize(arg) for arg in args),
+            tuple((key, self._quantize(value)) for key, value in sorted(kwargs.items())),
+            self._quantize(seed),
+        )
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_joint_ids(self, bullet_client, robot_id) -> list:
+        if robot_id not in self._joint_ids:
+            self._joint_ids[robot_id] = get_movable_joint_ids(bullet_client, robot_id)
+        return self._joint_ids[robot_id]
+
+
+def cached_ik(get_robot_id=None):
+    """Decorate an IK method of a controller to use the controller's ik_cache, if it has one. The seed is the
+    state of the movable joints of the robot, given by get_robot_id(controller, *args, **kwargs) or
+    controller.robot. On a hit, the robot is set to the cached solution, as the solver would have done.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache = getattr(self, 'ik_cache', None)
+            if cache is None:
+                return method(self, *args, **kwargs)
+            robot_id = self.robot if get_robot_id is None else get_robot_id(self, *args, **kwargs)
+            joint_ids = cache.get_joint_ids(self.bullet_client, robot_id)
+            seed = [self.bullet_client.getJointState(robot_id, idx)[0] for idx in joint_ids]
+            key = cache.make_key(method.__name__, args, kwargs, seed)
+            entry = cache.get(key)
+            if entry is not None:
+                result, joint_positions = entry
+                for idx, joint_position in zip(joint_ids, joint_positions):
+                    self.bullet_client.resetJointState(robot_id, idx, joint_position)
+                return copy.copy(result)
+
+            result = method(self, *args, **kwargs)
+            joint_positions = [self.bullet_client.getJointState(robot_id, idx)[0] for idx in joint_ids]
+            cache.put(key, (copy.copy(result), joint_positions))
+            return result
+        return wrapper
+    return decorator
@@ -1,7 +1,9 @@
 import pybullet as p
 import pybullet_data
+from pybullet_utils import bullet_client
 import numpy as np
 import math
+from pyrfuniverse.utils.ik_utils import cached_ik
 
 
 class RFUniverseJacoController:
@@ -13,17 +15,19 @@ class RFUniverseJacoController:
             init_joint_positions=[0, 47, 0, 30, 0, 65, 0, 0, 0, 0],
             render=False
     ):
+        # Each controller has its own physics server, so that controllers don't share state.
         if render:
-            p.connect(p.GUI)  # For debug mode
+            self.bullet_client = bullet_client.BulletClient(connection_mode=p.GUI)  # For debug mode
         else:
-            p.connect(p.DIRECT)
+            self.bullet_client = bullet_client.BulletClient(connection_mode=p.DIRECT)
 
-        p.configureDebugVisualizer(p.COV_ENABLE_Y_AXIS_UP, 1)
-        p.setAdditionalSearchPath(pybullet_data.getDataPath())
-        p.setGravity(0, -9.8, 0)
+        self.bullet_client.configureDebugVisualizer(p.COV_ENABLE_Y_AXIS_UP, 1)
+        self.bullet_client.setAdditionalSearchPath(pybullet_data.getDataPath())
+        self.bullet_client.setGravity(0, -9.8, 0)
 
-        self.bullet_client = p
         self.bullet_flags = self.bullet_client.URDF_ENABLE_CACHED_GRAPHICS_SHAPES
+        # Optional pyrfuniverse.utils.ik_utils.IKCache of IK solutions.
+        self.ik_cache = None
 
         self.robot_name = 'jaco'
         self.robot_urdf = robot_urdf
@@ -69,6 +73,7 @@ class RFUniverseJacoController:
 
         return pybullet_joint_pos
 
+    @cached_ik()
     def calculate_ik(self, unity_eef_pos, eef_orn=None) -> list:
         if eef_orn is None:
             eef_orn = self.bullet_client.getQuaternionFromEuler([math.pi / 2., 0., 0.])
@@ -83,6 +88,7 @@ class RFUniverseJacoController:
 
         return self.get_unity_joint_pos_from_pybullet(joint_positions)
 
+    @cached_ik()
     def calculate_ik_recursive(self, unity_eef_pos, eef_orn=None) -> list:
         if eef_orn is None:
             eef_orn = self.bullet_client.getQuaternionFromEuler([math.pi / 2., 0., 0.])
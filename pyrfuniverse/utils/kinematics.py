@@ -0,0 +1,253 @@
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+
+def rpy_to_matrix(rpy) -> np.ndarray:
+    """Rotation matrix of URDF roll, pitch and yaw angles (fixed axes X, Y, Z)."""
+    roll, pitch, yaw = rpy
+    cr, sr = np.cos(roll), np.sin(roll)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    return np.array([
+        [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+        [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+        [-sp, cp * sr, cp * cr],
+    ])
+
+
+def quaternion_to_matrix(quaternion) -> np.ndarray:
+    """Rotation matrices of (..., 4) quaternions in pybullet (x, y, z, w) order."""
+    q = np.asarray(quaternion, dtype=np.float64)
+    q = q / np.linalg.norm(q, axis=-1, keepdims=True)
+    x, y, z, w = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    return np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)], axis=-1),
+        np.stack([2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)], axis=-1),
+        np.stack([2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)], axis=-1),
+    ], axis=-2)
+
+
+def _transform(rotation=None, translation=None) -> np.ndarray:
+    transform = np.eye(4)
+    if rotation is not None:
+        transform[:3, :3] = rotation
+    if translation is not None:
+        transform[:3, 3] = translation
+    return transform
+
+
+def _parse_floats(element, attribute, default) -> np.ndarray:
+    if element is None or element.get(attribute) is None:
+        return np.array(default, dtype=np.float64)
+    return np.array(element.get(attribute).split(), dtype=np.float64)
+
+
+class KinematicChain:
+    """
+    The joint chain of a URDF from a base link to a tip link, as NumPy arrays, with vectorized forward
+    kinematics and damped least squares inverse kinematics. Unlike the pybullet controllers, it needs no
+    physics server: construction only parses the URDF, and chains can be used from any number of threads or
+    worker processes.
+
+    Fixed joints are folded into the transforms between movable joints, so the movable joints are the
+    variables of the chain, in order from the base. Positions are in the frame of the base link, or in the world
+    frame of a pybullet body loaded with base_pos and base_orn.
+    """
+
+    def __init__(
+            self,
+            urdf_file,
+            tip_link,
+            base_link=None,
+            base_pos=(0, 0, 0),
+            base_orn=(0, 0, 0, 1),
+    ):
+        """
+        Args:
+            urdf_file: Str. Path of the URDF file.
+            tip_link: Str. Name of the end effector link.
+            base_link: Str. Optional. Name of the link the chain starts from, the root of the URDF if None.
+            base_pos: Optional. Position of the base link in the world.
+            base_orn: Optional. Quaternion of the base link in the world, in pybullet (x, y, z, w) order.
+        """
+        root = ET.parse(urdf_file).getroot()
+        joints_by_child = {joint.find('child').get('link'): joint for joint in root.findall('joint')}
+
+        chain = []
+        link = tip_link
+        while link != base_link and link in joints_by_child:
+            joint = joints_by_child[link]
+            chain.append(joint)
+            link = joint.find('parent').get('link')
+        assert base_link is None or link == base_link, \
+            'Link <%s> is not a descendant of link <%s>.' % (tip_link, base_link)
+        chain.reverse()
+
+        self.urdf_file = urdf_file
+        self.base_link = link
+        self.tip_link = tip_link
+        self.joint_names = []
+        origins = []
+        axes = []
+        prismatic = []
+        lower = []
+        upper = []
+        # Transform from the frame of the previous movable joint (after its motion) to the next joint.
+        transform = _transform(quaternion_to_matrix(base_orn), base_pos)
+        for joint in chain:
+            origin = joint.find('origin')
+            transform = transform @ _transform(
+                rpy_to_matrix(_parse_floats(origin, 'rpy', [0, 0, 0])),
+                _parse_floats(origin, 'xyz', [0, 0, 0])
+            )
+            joint_type = joint.get('type')
+            if joint_type in ('fixed', 'floating', 'planar'):
+                continue
+            limit = joint.find('limit')
+            self.joint_names.append(joint.get('name'))
+            origins.append(transform)
+            axis = _parse_floats(joint.find('axis'), 'xyz', [1, 0, 0])
+            axes.append(axis / np.linalg.norm(axis))
+            prismatic.append(joint_type == 'prismatic')
+            if joint_type == 'continuous' or limit is None:
+                lower.append(-np.inf)
+                upper.append(np.inf)
+            else:
+                lower.append(float(limit.get('lower', 0)))
+                upper.append(float(limit.get('upper', 0)))
+            transform = np.eye(4)
+
+        self.num_dof = len(self.joint_names)
+        self.origins = np.array(origins).reshape(self.num_dof, 4, 4)
+        self.axes = np.array(axes).reshape(self.num_dof, 3)
+        self.prismatic = np.array(prismatic, dtype=bool)
+        self.lower_limits = np.array(lower)
+        self.upper_limits = np.array(upper)
+        self.tip_offset = transform
+        # Cross product matrices of the axes, for Rodrigues' rotation formula.
+        k = np.zeros((self.num_dof, 3, 3))
+        k[:, 0, 1], k[:, 0, 2], k[:, 1, 2] = -self.axes[:, 2], self.axes[:, 1], -self.axes[:, 0]
+        k[:, 1, 0], k[:, 2, 0], k[:, 2, 1] = self.axes[:, 2], -self.axes[:, 1], self.axes[:, 0]
+        self._k = k
+        self._k2 = k @ k
+
+    def _motion(self, i, q) -> np.ndarray:
+        motion = np.zeros(q.shape + (4, 4))
+        if self.prismatic[i]:
+            motion[..., :3, :3] = np.eye(3)
+            motion[..., :3, 3] = q[..., None] * self.axes[i]
+        else:
+            s = np.sin(q)[..., None, None]
+            c = np.cos(q)[..., None, None]
+            motion[..., :3, :3] = np.eye(3) + s * self._k[i] + (1 - c) * self._k2[i]
+        motion[..., 3, 3] = 1
+        return motion
+
+    def _joint_frames(self, q):
+        # World frames of every joint before its motion, and of the tip.
+        frames = []
+        transform = np.broadcast_to(np.eye(4), q.shape[:-1] + (4, 4))
+        for i in range(self.num_dof):
+            transform = transform @ self.origins[i]
+            frames.append(transform)
+            transform = transform @ self._motion(i, q[..., i])
+        return frames, transform @ self.tip_offset
+
+    def forward_kinematics(self, joint_positions) -> np.ndarray:
+        """
+        Compute the pose of the tip link.
+
+        Args:
+            joint_positions: (..., num_dof) array of joint positions, in radians or meters.
+
+        Returns:
+            (..., 4, 4) array of homogeneous transforms of the tip link.
+        """
+        q = np.asarray(joint_positions, dtype=np.float64)
+        return self._joint_frames(q)[1]
+
+    def jacobian(self, joint_positions):
+        """
+        Compute the geometric Jacobian of the tip link.
+
+        Args:
+            joint_positions: (..., num_dof) array of joint positions.
+
+        Returns:
+            The (..., 4, 4) tip transforms and the (..., 6, num_dof) Jacobians, with linear rows first.
+        """
+        q = np.asarray(joint_positions, dtype=np.float64)
+        frames, tip = self._joint_frames(q)
+        jacobian = np.zeros(q.shape[:-1] + (6, self.num_dof))
+        for i, frame in enumerate(frames):
+            axis = frame[..., :3, :3] @ self.axes[i]
+            if self.prismatic[i]:
+                jacobian[..., :3, i] = axis
+            else:
+                jacobian[..., :3, i] = np.cross(axis, tip[..., :3, 3] - frame[..., :3, 3])
+                jacobian[..., 3:, i] = axis
+        return tip, jacobian
+
+    def inverse_kinematics(
+            self,
+            positions,
+            orientations=None,
+            initial_joint_positions=None,
+            tolerance=1e-4,
+            max_iterations=100,
+            damping=0.05,
+    ):
+        """
+        Solve inverse kinematics of a batch of targets at once with damped least squares. Targets stop being
+        updated once they converge, and the solver returns as soon as all of them did.
+
+        Args:
+            positions: (N, 3) array of target positions of the tip link.
+            orientations: Optional. A quaternion for every target, or an (N, 4) array of quaternions, in pybullet
+                (x, y, z, w) order. Only positions are solved for if None.
+            initial_joint_positions: Optional. Joint positions to start from, (num_dof,) for every target or
+                (N, num_dof). Zeros, clipped to the limits, if None.
+            tolerance: Position error, in meters, and orientation error, in radians, under which a target converged.
+            max_iterations: Maximum number of iterations.
+            damping: Damping factor, which trades convergence speed for stability near singularities.
+
+        Returns:
+            The (N, num_dof) array of joint positions and the (N,) bool array of converged targets.
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        n = len(positions)
+        target_rotations = None
+        if orientations is not None:
+            target_rotations = np.broadcast_to(quaternion_to_matrix(orientations), (n, 3, 3))
+        if initial_joint_positions is None:
+            initial_joint_positions = np.zeros(self.num_dof)
+        q = np.array(np.broadcast_to(initial_joint_positions, (n, self.num_dof)), dtype=np.float64)
+        q = np.clip(q, self.lower_limits, self.upper_limits)
+
+        rows = 3 if target_rotations is None else 6
+        regularization = damping ** 2 * np.eye(rows)
+        converged = np.zeros(n, dtype=bool)
+        active = np.arange(n)
+        for _ in range(max_iterations):
+            tip, jacobian = self.jacobian(q[active])
+            error = positions[active] - tip[:, :3, 3]
+            if target_rotations is not None:
+                # Rotation error as an axis times the sine of the angle, which vanishes at the target.
+                current = tip[:, :3, :3]
+                rotation_error = 0.5 * np.cross(current, target_rotations[active], axis=-2).sum(axis=-1)
+                error = np.concatenate([error, rotation_error], axis=-1)
+            else:
+                jacobian = jacobian[:, :3]
+            done = np.linalg.norm(error[:, :3], axis=-1) < tolerance
+            if target_rotations is not None:
+                done &= np.linalg.norm(error[:, 3:], axis=-1) < tolerance
+            converged[active[done]] = True
+            if done.all():
+                break
+            active, jacobian, error = active[~done], jacobian[~done], error[~done]
+            jacobian_t = np.swapaxes(jacobian, -1, -2)
+            step = jacobian_t @ np.linalg.solve(jacobian @ jacobian_t + regularization, error[..., None])
+            q[active] = np.clip(q[active] + step[..., 0], self.lower_limits, self.upper_limits)
+
+        return q, converged
@@ -1,7 +1,9 @@
 import pybullet as p
 import pybullet_data
+from pybullet_utils import bullet_client
 import numpy as np
 import math
+from pyrfuniverse.utils.ik_utils import cached_ik, calculate_ik_batch, get_bullet_positions_from_unity
 
 
 class RFUniverseKinovaController:
@@ -20,17 +22,19 @@ class RFUniverseKinovaController:
             render=False
     ):
     
+        # Each controller has its own physics server, so that controllers don't share state.
         if render:
-            p.connect(p.GUI) # For debug mode
+            self.bullet_client = bullet_client.BulletClient(connection_mode=p.GUI) # For debug mode
         else:
-            p.connect(p.DIRECT)
+            self.bullet_client = bullet_client.BulletClient(connection_mode=p.DIRECT)
 
-        p.configureDebugVisualizer(p.COV_ENABLE_Y_AXIS_UP, 1)
-        p.setAdditionalSearchPath(pybullet_data.getDataPath())
-        p.setGravity(0, -9.8, 0)
+        self.bullet_client.configureDebugVisualizer(p.COV_ENABLE_Y_AXIS_UP, 1)
+        self.bullet_client.setAdditionalSearchPath(pybullet_data.getDataPath())
+        self.bullet_client.setGravity(0, -9.8, 0)
 
-        self.bullet_client = p
         self.bullet_flags = self.bullet_client.URDF_ENABLE_CACHED_GRAPHICS_SHAPES
+        # Optional pyrfuniverse.utils.ik_utils.IKCache of IK solutions.
+        self.ik_cache = None
 
         self.robot_name = 'kinova'
         self.robot_urdf = robot_urdf
@@ -75,6 +79,7 @@ class RFUniverseKinovaController:
 
         return pybullet_joint_pos
 
+    @cached_ik()
     def calculate_ik(self, unity_eef_pos, eef_orn=None) -> list:
         if eef_orn is None:
             eef_orn = self.bullet_client.getQuaternionFromEuler([math.pi / 2., 0., 0.])
@@ -89,6 +94,7 @@ class RFUniverseKinovaController:
 
         return self.get_unity_joint_pos_from_pybullet(joint_positions)
 
+    @cached_ik()
     def calculate_ik_recursive(self, unity_eef_pos, eef_orn=None) -> list:
         if eef_orn is None:
             eef_orn = self.bullet_client.getQuaternionFromEuler([math.pi / 2., 0., 0.])
@@ -103,6 +109,29 @@ class RFUniverseKinovaController:
 
         return self.get_unity_joint_pos_from_pybullet(joint_positions)
 
+    def calculate_ik_batch(self, unity_eef_positions, eef_orns=None, tolerance=1e-3, max_iterations=10) -> np.ndarray:
+        """
+        Calculate the joint positions of a batch of end effector targets. Each target starts from the solution of
+        the previous one and stops as soon as it is within tolerance, see pyrfuniverse.utils.ik_utils.
+
+        Args:
+            unity_eef_positions: (N, 3) array of end effector positions, in Unity coordinates.
+            eef_orns: Optional. A pybullet quaternion for every target, or an (N, 4) array of quaternions.
+            tolerance: Distance to the target, in meters, under which a solution is accepted.
+            max_iterations: Maximum number of calculateInverseKinematics() calls per target.
+
+        Returns:
+            (N, num_dof) array of Unity joint positions, in degrees.
+        """
+        if eef_orns is None:
+            eef_orns = self.bullet_client.getQuaternionFromEuler([math.pi / 2., 0., 0.])
+
+        joint_positions = calculate_ik_batch(
+            self.bullet_client, self.robot, self.end_effector_id, get_bullet_positions_from_unity(unity_eef_positions),
+            eef_orns, tolerance=tolerance, max_iterations=max_iterations, reset_joint_ids=self.revolute_joint_ids)
+
+        return 180 * joint_positions[:, :self.num_dof] / math.pi
+
     def get_link_state(self, link_idx):
         link_state = self.bullet_client.getLinkState(self.robot, link_idx)
 
@@ -1,8 +1,11 @@
 import pybullet as p
 import pybullet_data
+from pybullet_utils import bullet_client
 import numpy as np
 import math
 import os
+from pyrfuniverse.utils.ik_utils import cached_ik, calculate_ik_batch, get_bullet_positions_from_unity
+from pyrfuniverse.utils.kinematics import KinematicChain
 
 
 class RFUniverseToborController:
@@ -23,15 +26,21 @@ class RFUniverseToborController:
             revise=False
     ):
         self.revise = revise
+        # Each controller has its own physics server, so that controllers don't share state.
         if render:
-            p.connect(p.GUI)
+            self.bullet_client = bullet_client.BulletClient(connection_mode=p.GUI)
         else:
-            p.connect(p.DIRECT)
-        p.configureDebugVisualizer(p.COV_ENABLE_Y_AXIS_UP, 1)
-        p.setAdditionalSearchPath(urdf_folder)
-        p.setGravity(0, -9.8, 0)
-        self.bullet_client = p
+            self.bullet_client = bullet_client.BulletClient(connection_mode=p.DIRECT)
+
+        self.bullet_client.configureDebugVisualizer(p.COV_ENABLE_Y_AXIS_UP, 1)
+        self.bullet_client.setAdditionalSearchPath(urdf_folder)
+        self.bullet_client.setGravity(0, -9.8, 0)
+
         self.bullet_flags = self.bullet_client.URDF_ENABLE_CACHED_GRAPHICS_SHAPES
+        # Optional pyrfuniverse.utils.ik_utils.IKCache of IK solutions.
+        self.ik_cache = None
+        # NumPy kinematic chain of each arm and the pybullet ids of its joints, built on first use.
+        self.kinematic_chains = {}
 
         self.urdf_folder = urdf_folder
         self.left_base_pos = left_base_pos
@@ -93,6 +102,8 @@ class RFUniverseToborController:
 
         return pybullet_joint_pos
 
+    @cached_ik(lambda controller, mode, *args, **kwargs:
+               controller.left_arm_id if mode == 'left' else controller.right_arm_id)
     def calculate_ik(self, mode, unity_eef_pos, eef_orn=None) -> list:
         self._check_mode(mode)
         if mode == 'left':
@@ -119,6 +130,84 @@ class RFUniverseToborController:
 
         return self.get_unity_joint_pos_from_pybullet(joint_positions)
 
+    def calculate_ik_batch(
+            self, mode, unity_eef_positions, eef_orns=None, tolerance=None, max_iterations=None, solver='pybullet'
+    ) -> np.ndarray:
+        """
+        Calculate the joint positions of an arm for a batch of end effector targets. With the pybullet solver, each
+        target starts from the solution of the previous one and stops as soon as it is within tolerance, see
+        pyrfuniverse.utils.ik_utils. The numpy solver solves every target at once from the current state of the
+        arm, see pyrfuniverse.utils.kinematics.KinematicChain, which is faster for large batches. Either way,
+        the arm is left at the solution of the last target.
+
+        Args:
+            mode: 'left' or 'right'.
+            unity_eef_positions: (N, 3) array of end effector positions, in Unity coordinates.
+            eef_orns: Optional. A pybullet quaternion for every target, or an (N, 4) array of quaternions.
+            tolerance: Optional. Distance to the target, in meters, under which a solution is accepted. Defaults to
+                ik_tolerance.
+            max_iterations: Optional. Maximum number of calculateInverseKinematics() calls per target, 10 by
+                default, or of damped least squares iterations with the numpy solver, 100 by default.
+            solver: 'pybullet' or 'numpy'.
+
+        Returns:
+            (N, num_dof) array of Unity joint positions, in degrees.
+        """
+        self._check_mode(mode)
+        assert solver in ['pybullet', 'numpy'], \
+            'Error: IK solver must be \'pybullet\' or \'numpy\'.'
+        if mode == 'left':
+            robot_id = self.left_arm_id
+        else:
+            robot_id = self.right_arm_id
+
+        if eef_orns is None:
+            eef_orns = self.bullet_client.getQuaternionFromEuler([math.pi / 2., 0., 0.])
+        if tolerance is None:
+            tolerance = self.ik_tolerance
+        eef_positions = get_bullet_positions_from_unity(unity_eef_positions)
+
+        if solver == 'numpy':
+            chain, joint_ids = self.get_kinematic_chain(mode)
+            initial_joint_positions = [self.bullet_client.getJointState(robot_id, idx)[0] for idx in joint_ids]
+            joint_positions, _ = chain.inverse_kinematics(
+                eef_positions, eef_orns, initial_joint_positions, tolerance=tolerance,
+                max_iterations=100 if max_iterations is None else max_iterations)
+            for idx, joint_position in zip(joint_ids, joint_positions[-1]):
+                self.bullet_client.resetJointState(robot_id, idx, joint_position)
+        else:
+            joint_positions = calculate_ik_batch(
+                self.bullet_client, robot_id, self.end_effector_id, eef_positions, eef_orns, tolerance=tolerance,
+                max_iterations=10 if max_iterations is None else max_iterations,
+                reset_joint_ids=self.revolute_joint_ids)
+
+        revise_factor = self.revise_factor_old if self.revise is True else self.revise_factor
+        return revise_factor * joint_positions[:, :self.num_dof] * 180 / math.pi
+
+    def get_kinematic_chain(self, mode):
+        """
+        Return (chain, joint_ids)
+        chain: The KinematicChain of the arm, from its base link to the end effector.
+        joint_ids: The pybullet ids of the joints of the chain, in the same order.
+        """
+        self._check_mode(mode)
+        if mode not in self.kinematic_chains:
+            if mode == 'left':
+                robot_id, urdf, base_pos, base_orn = \
+                    self.left_arm_id, self.left_urdf, self.left_base_pos, self.left_base_orn
+            else:
+                robot_id, urdf, base_pos, base_orn = \
+                    self.right_arm_id, self.right_urdf, self.right_base_pos, self.right_base_orn
+            tip_link = self.bullet_client.getJointInfo(robot_id, self.end_effector_id)[12].decode()
+            chain = KinematicChain(os.path.join(self.urdf_folder, urdf), tip_link, base_pos=base_pos, base_orn=base_orn)
+            joint_ids_by_name = {
+                self.bullet_client.getJointInfo(robot_id, j)[1].decode(): j
+                for j in range(self.bullet_client.getNumJoints(robot_id))
+            }
+            self.kinematic_chains[mode] = (chain, [joint_ids_by_name[name] for name in chain.joint_names])
+
+        return self.kinematic_chains[mode]
+
     def get_link_position(self, mode, link_id):
         """
         Return (link_world_position, world_link_frame_position)